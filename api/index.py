@@ -2,7 +2,14 @@
 
 import os
 import sys
+import gzip
 import json
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from operator import itemgetter
 from pathlib import Path
 
 # Add project root to path
@@ -12,9 +19,16 @@ current_dir = Path(__file__).resolve().parent
 project_root = current_dir.parent
 sys.path.insert(0, str(project_root))
 
-from datetime import datetime
+from datetime import datetime, timezone
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Try imports immediately to fail fast if they don't exist
 try:
@@ -28,17 +42,66 @@ except ImportError:
     AIClassifier = None
     StatusTracker = None
 
+# Load the Google client stack during container init rather than on first request
+try:
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import build
+except ImportError:
+    Credentials = None
+    build = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (keeps Flask's sorted-key output)."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(
     __name__,
     template_folder=str(project_root / "dashboard" / "templates"),
     static_folder=str(project_root / "dashboard" / "static")
 )
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+
+def dump_json(obj) -> bytes:
+    """Serialize to JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def json_response(body: bytes) -> Response:
+    """Wrap pre-serialized JSON, gzip-compressing it if the client accepts it."""
+    if "gzip" in request.accept_encodings:
+        response = Response(gzip.compress(body, compresslevel=1), mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body, mimetype="application/json")
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+# Env vars don't change within a lambda, so the /tmp files only need writing once
+_CREDS_WRITTEN = False
 
 
 def setup_oauth_credentials():
     """Setup OAuth credentials from environment variables."""
-    # ... (same as before) ...
+    global _CREDS_WRITTEN
+    if _CREDS_WRITTEN and os.path.exists("/tmp/token.json"):
+        return
+
     client_creds = os.environ.get("GOOGLE_CLIENT_CREDENTIALS")
     token_json = os.environ.get("GOOGLE_TOKEN")
     
@@ -50,24 +113,41 @@ def setup_oauth_credentials():
         with open("/tmp/token.json", "w") as f:
             f.write(token_json)
 
+    _CREDS_WRITTEN = True
+
+
+# Sheets service reused across warm invocations (refreshed before the 1h token expiry)
+SERVICE_TTL = 3300
+_SERVICE_CACHE = {"service": None, "sid": None, "exp": 0.0}
+
 
 def get_sheets_service():
     """Get Google Sheets service using OAuth credentials."""
+    if _SERVICE_CACHE["service"] and time.time() < _SERVICE_CACHE["exp"]:
+        return _SERVICE_CACHE["service"], _SERVICE_CACHE["sid"]
+
     setup_oauth_credentials()
     
     spreadsheet_id = os.environ.get("SPREADSHEET_ID")
     if not spreadsheet_id:
         return None, None
     
+    if Credentials is None:
+        print("Error initializing Sheets: Google client libraries not installed")
+        return None, None
+
     try:
-        from google.oauth2.credentials import Credentials
-        from googleapiclient.discovery import build
-        
         # Try to load token
         token_path = "/tmp/token.json"
         if os.path.exists(token_path):
             creds = Credentials.from_authorized_user_file(token_path)
-            service = build("sheets", "v4", credentials=creds)
+            # Bundled static discovery doc; skip the file cache (read-only fs warning)
+            service = build("sheets", "v4", credentials=creds, cache_discovery=False)
+            _SERVICE_CACHE.update(
+                service=service,
+                sid=spreadsheet_id,
+                exp=time.time() + SERVICE_TTL,
+            )
             return service, spreadsheet_id
     except Exception as e:
         print(f"Error initializing Sheets: {e}")
@@ -75,7 +155,35 @@ def get_sheets_service():
     return None, None
 
 
+# Fetched rows shared by /api/applications and /api/stats for a short window
+APPS_TTL = 60
+# Derived views (stats and serialized responses) are filled lazily per fetch
+_APPS_CACHE = {"data": None, "stats": None, "apps_body": None, "stats_body": None, "exp": 0.0}
+
+
+def invalidate_applications_cache():
+    """Drop cached sheet rows so the next read hits Sheets again."""
+    _APPS_CACHE["exp"] = 0.0
+
+
 def get_applications_from_sheet():
+    """Fetch applications, served from the in-process cache when fresh."""
+    if _APPS_CACHE["data"] is not None and time.time() < _APPS_CACHE["exp"]:
+        return _APPS_CACHE["data"]
+
+    applications = _fetch_applications_from_sheet()
+    if applications is not None:
+        _APPS_CACHE.update(
+            data=applications,
+            stats=None,
+            apps_body=None,
+            stats_body=None,
+            exp=time.time() + APPS_TTL,
+        )
+    return applications
+
+
+def _fetch_applications_from_sheet():
     """Fetch applications directly from Google Sheets."""
     service, spreadsheet_id = get_sheets_service()
     
@@ -85,7 +193,10 @@ def get_applications_from_sheet():
     try:
         result = service.spreadsheets().values().get(
             spreadsheetId=spreadsheet_id,
-            range="Applications!A:G"
+            range="Applications!A:G",
+            majorDimension="ROWS",
+            valueRenderOption="UNFORMATTED_VALUE",
+            dateTimeRenderOption="FORMATTED_STRING"
         ).execute()
         
         values = result.get("values", [])
@@ -93,37 +204,88 @@ def get_applications_from_sheet():
             return []
         
         headers = ["company", "role", "status", "applied_date", "last_updated", "email_subject", "detection_reason"]
-        applications = []
-        
-        for row in values[1:]:  # Skip header row
-            app = {}
-            for i, header in enumerate(headers):
-                app[header] = row[i] if i < len(row) else ""
-            applications.append(app)
-        
-        return applications
+        n = len(headers)
+
+        # UNFORMATTED_VALUE returns numeric-looking cells (e.g. a company named
+        # "1800") as numbers; the dashboard expects strings. Sheets also omits
+        # trailing empty cells, so pad short rows before zipping.
+        return [
+            dict(zip(headers, [str(cell) for cell in row] + [""] * (n - len(row))))
+            for row in values[1:]  # Skip header row
+        ]
     except Exception as e:
         print(f"Error fetching data: {e}")
         return None
 
 
+# Placeholder values that mark a row as unidentified
+UNKNOWN_COMPANIES = frozenset({"unknown", "unknown company", ""})
+UNKNOWN_ROLES = frozenset({"unknown", "unknown position", "", "unspecified"})
+
+
+def _normalize_cell(value) -> str:
+    """Lowercase/strip a cell (rows are already coerced to str)."""
+    return value.strip().lower() if value else ""
+
+
+def is_unknown_row(app: dict) -> bool:
+    """True if both company and role are placeholders."""
+    return (
+        _normalize_cell(app.get("company")) in UNKNOWN_COMPANIES and
+        _normalize_cell(app.get("role")) in UNKNOWN_ROLES
+    )
+
+
+# Non-ISO date formats still found in older sheet rows
+DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%b %d, %Y")
+
+
+@lru_cache(maxsize=1024)
+def parse_date(date_str):
+    """Parse an applied_date cell, trying ISO first (the format we write).
+
+    Cached because many rows share the same date string.
+    """
+    if not date_str:
+        return datetime.min
+    s = str(date_str).strip()
+    try:
+        return datetime.fromisoformat(s[:10])
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return datetime.min
+
+
 def get_stats_from_applications(applications):
     """Calculate stats from applications."""
-    stats = {
+    counts = Counter(app.get("status", "Applied") for app in applications)
+    return {
         "total": len(applications),
-        "Applied": 0,
-        "Assessment": 0,
-        "Interview": 0,
-        "Offer": 0,
-        "Rejected": 0
+        "Applied": counts["Applied"],
+        "Assessment": counts["Assessment"],
+        "Interview": counts["Interview"],
+        "Offer": counts["Offer"],
+        "Rejected": counts["Rejected"]
     }
-    
-    for app in applications:
-        status = app.get("status", "Applied")
-        if status in stats:
-            stats[status] += 1
-    
-    return stats
+
+
+def get_applications_and_stats():
+    """Return (applications, stats) from a single (cached) Sheets read."""
+    applications = get_applications_from_sheet()
+    if applications is None:
+        return None, None
+    if applications is not _APPS_CACHE["data"]:
+        return applications, get_stats_from_applications(applications)
+
+    # Counted once per fetch, then reused by every request until the cache expires
+    if _APPS_CACHE["stats"] is None:
+        _APPS_CACHE["stats"] = get_stats_from_applications(applications)
+    return applications, _APPS_CACHE["stats"]
 
 
 @app.route("/")
@@ -146,58 +308,69 @@ def api_applications():
                 {"company": "Demo Company", "role": "Software Engineer", "status": "Applied", "applied_date": "2026-02-07", "last_updated": "2026-02-07 12:00", "detection_reason": "API returned None (Auth failed?)"}
             ])
         
+        # Rows unchanged since the last request: reuse the serialized response
+        is_cached = applications is _APPS_CACHE["data"]
+        if is_cached and _APPS_CACHE["apps_body"] is not None:
+            return json_response(_APPS_CACHE["apps_body"])
+
         # 1. Filter out "Unknown"
-        filtered_applications = []
-        for app in applications:
-            company = str(app.get("company", "")).lower().strip()
-            role = str(app.get("role", "")).lower().strip()
-            
-            if (company in ["unknown", "unknown company", ""] and 
-                role in ["unknown", "unknown position", "", "unspecified"]):
-                continue
-            filtered_applications.append(app)
+        filtered_applications = [app for app in applications if not is_unknown_row(app)]
         
-        # 2. Sort by applied_date
-        def parse_date(date_str):
-            # Ensure datetime is available
-            from datetime import datetime
-            
-            if not date_str: return datetime.min
-            s = str(date_str).strip()
-            formats = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%b %d, %Y"]
-            for fmt in formats:
-                try:
-                    return datetime.strptime(s, fmt)
-                except:
-                    continue
-            return datetime.min
-
-        filtered_applications.sort(
-            key=lambda x: parse_date(x.get("applied_date", "")), 
-            reverse=True
-        )
+        # 2. Sort by applied_date (parse each date once, then sort on it)
+        decorated = [
+            (parse_date(app.get("applied_date", "")), app)
+            for app in filtered_applications
+        ]
+        decorated.sort(key=itemgetter(0), reverse=True)
+        filtered_applications = [app for _, app in decorated]
         
-        return jsonify(filtered_applications)
+        body = dump_json(filtered_applications)
+        if is_cached:
+            _APPS_CACHE["apps_body"] = body
+        return json_response(body)
 
     except Exception as e:
-        import traceback
-        return jsonify({
-            "error": str(e),
-            "traceback": traceback.format_exc(),
-            # Don't return env vars in case of secrets, just return keys
-            "env_vars_keys": list(os.environ.keys())
-        }), 500
+        error = {"error": str(e)}
+        if os.environ.get("DEBUG"):
+            error["traceback"] = traceback.format_exc()
+        return jsonify(error), 500
 
 
 @app.route("/api/stats")
 def api_stats():
     """API endpoint for statistics."""
-    applications = get_applications_from_sheet()
+    applications, stats = get_applications_and_stats()
     
     if applications is None:
         return jsonify({"total": 1, "Applied": 1, "Assessment": 0, "Interview": 0, "Rejected": 0})
     
-    return jsonify(get_stats_from_applications(applications))
+    if stats is not _APPS_CACHE["stats"]:
+        return json_response(dump_json(stats))
+    if _APPS_CACHE["stats_body"] is None:
+        _APPS_CACHE["stats_body"] = dump_json(stats)
+    return json_response(_APPS_CACHE["stats_body"])
+
+
+# Concurrent classifier batches per /api/process run (kept low for Groq rate limits)
+CLASSIFY_WORKERS = 8
+
+
+def classify_email(classifier, email):
+    """Classify one email, returning None instead of raising."""
+    try:
+        return classifier.classify(email)
+    except Exception as e:
+        print(f"Error processing email {email.get('id')}: {e}")
+        return None
+
+
+def classify_batch(classifier, emails):
+    """Classify a batch in one LLM call, falling back to per-email classification."""
+    try:
+        return classifier.classify_batch(emails)
+    except Exception as e:
+        print(f"Error classifying batch: {e}")
+        return [classify_email(classifier, email) for email in emails]
 
 
 @app.route("/api/process")
@@ -238,21 +411,33 @@ def process_emails():
         
         processed_count = 0
         details = []
+        force_update = request.args.get("force") == "true"
+        
+        # Classify concurrently (network-bound LLM calls), then track serially:
+        # Sheets writes pick the next free row, so they must not interleave
+        to_classify = [email for email in emails if email]
+        batches = [
+            to_classify[i:i + classifier.BATCH_SIZE]
+            for i in range(0, len(to_classify), classifier.BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=CLASSIFY_WORKERS) as executor:
+            results = [
+                result
+                for batch_results in executor.map(partial(classify_batch, classifier), batches)
+                for result in batch_results
+            ]
         
-        for email in emails:
-            if not email: continue
+        for email, result in zip(to_classify, results):
+            if result is None: continue
             
             try:
-                # Classify
-                result = classifier.classify(email)
-                
-                # Track
-                updated, reason = tracker.process_classification(
+                # Track (buffered; written in one batch below)
+                updated, reason = tracker.stage(
                     result=result,
                     email_date=email.get("date", datetime.now()),
                     email_subject=email.get("subject", ""),
                     detection_reason=email.get("detection_reason", ""),
-                    force_update=request.args.get("force") == "true"
+                    force_update=force_update
                 )
                 
                 if updated:
@@ -277,6 +462,13 @@ def process_emails():
                 print(f"Error processing email {email.get('id')}: {e}")
                 continue
         
+        written, write_reason = tracker.flush()
+        if not written:
+            return jsonify({"error": write_reason, "details": details}), 500
+
+        if processed_count:
+            invalidate_applications_cache()
+
         response = {
             "status": "success",
             "processed": processed_count,
@@ -296,7 +488,6 @@ def process_emails():
         return jsonify(response)
         
     except Exception as e:
-        import traceback
         return jsonify({
             "error": str(e),
             "traceback": traceback.format_exc()
@@ -304,14 +495,19 @@ def process_emails():
 
 
 
+# Env vars are fixed for the lifetime of a serverless instance
+_SPREADSHEET_CONFIGURED = bool(os.environ.get("SPREADSHEET_ID"))
+_TOKEN_CONFIGURED = bool(os.environ.get("GOOGLE_TOKEN"))
+
+
 @app.route("/api/health")
 def health():
     """Health check endpoint."""
     return jsonify({
         "status": "ok",
-        "timestamp": datetime.now().isoformat(),
-        "spreadsheet_configured": bool(os.environ.get("SPREADSHEET_ID")),
-        "credentials_configured": bool(os.environ.get("GOOGLE_TOKEN"))
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "spreadsheet_configured": _SPREADSHEET_CONFIGURED,
+        "credentials_configured": _TOKEN_CONFIGURED
     })
 
 @app.route("/debug")
@@ -336,7 +532,7 @@ def debug():
         tpl_dir = project_root / "dashboard" / "templates"
         files.append(f"Templates ({tpl_dir}): {os.listdir(tpl_dir)}")
     except Exception as e:
-        files.append(f"Error listing templates: {window.e}")
+        files.append(f"Error listing templates: {e}")
 
     return jsonify({
         "files": files,
@@ -5,6 +5,7 @@ Or: python dashboard/app.py
 """
 
 import sys
+from datetime import datetime
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -57,7 +58,6 @@ def api_refresh():
     """Trigger a manual refresh (fetch new emails)."""
     from src.gmail_client import GmailClient
     from src.ai_classifier import AIClassifier
-    from datetime import datetime, timedelta
     
     sheets, tracker = get_clients()
     gmail = GmailClient()
@@ -67,12 +67,13 @@ def api_refresh():
     emails = gmail.get_messages(days_back=1)
     processed = 0
     
-    for email in emails:
-        if not email:
-            continue
+    emails = [email for email in emails if email]
+    results = classifier.classify_batch(emails)
+
+    for email, result in zip(emails, results):
         try:
-            result = classifier.classify(email)
-            updated = tracker.process_classification(
+            # Buffered; all rows and colors are written by flush() below
+            updated, _ = tracker.stage(
                 result=result,
                 email_date=email.get("date", datetime.now()),
                 email_subject=email.get("subject", ""),
@@ -82,7 +83,11 @@ def api_refresh():
                 processed += 1
         except Exception:
             continue
-    
+
+    written, write_reason = tracker.flush()
+    if not written:
+        return jsonify({"processed": 0, "status": "error", "error": write_reason}), 500
+
     return jsonify({"processed": processed, "status": "ok"})
 
 
@@ -15,6 +15,7 @@ import time
 import sys
 import io
 from datetime import datetime, timedelta
+from typing import Optional
 
 # Fix Windows console encoding
 if sys.platform == "win32":
@@ -43,19 +44,23 @@ def process_emails(gmail: GmailClient, classifier: AIClassifier, tracker: Status
         print("   No new emails to process")
         return 0
     
+    emails = [email for email in emails if email]
+
+    # Classify in batches (several emails per LLM request)
+    try:
+        results = classifier.classify_batch(emails)
+    except Exception as e:
+        print(f"   [WARN] Batch classification failed: {e}")
+        return 0
+
     processed = 0
-    for email in emails:
-        if not email:
-            continue
-            
+    for email, result in zip(emails, results):
         try:
             print(f"   Processing: {email.get('subject')} ({email.get('date')})")
-            # Classify the email
-            result = classifier.classify(email)
             print(f"      -> Classified: {result.company} | {result.role} | {result.status}")
             
-            # Track the application
-            updated, reason = tracker.process_classification(
+            # Track the application (buffered; written in one batch below)
+            updated, reason = tracker.stage(
                 result=result,
                 email_date=email.get("date", datetime.now()),
                 email_subject=email.get("subject", ""),
@@ -78,7 +83,12 @@ def process_emails(gmail: GmailClient, classifier: AIClassifier, tracker: Status
         except Exception as e:
             print(f"   [WARN] Error processing email: {e}")
             continue
-    
+
+    written, write_reason = tracker.flush()
+    if not written:
+        print(f"   [WARN] Could not write updates to the sheet: {write_reason}")
+        return 0
+
     return processed
 
 
@@ -92,16 +102,21 @@ def live_monitor(gmail: GmailClient, classifier: AIClassifier, tracker: StatusTr
     try:
         while True:
             # Fetch only new emails
-            emails = gmail.get_messages(after_date=last_check, max_results=20)
+            emails = gmail.get_messages(after_date=last_check, max_results=20, incremental=True)
             
+            emails = [email for email in emails if email]
+            processed = True
             if emails:
-                for email in emails:
-                    if not email:
-                        continue
-                    
+                try:
+                    results = classifier.classify_batch(emails)
+                except Exception as e:
+                    print(f"   [WARN] Error: {e}")
+                    results = []
+                    processed = False
+
+                for email, result in zip(emails, results):
                     try:
-                        result = classifier.classify(email)
-                        updated, reason = tracker.process_classification(
+                        updated, reason = tracker.stage(
                             result=result,
                             email_date=email.get("date", datetime.now()),
                             email_subject=email.get("subject", ""),
@@ -114,6 +129,16 @@ def live_monitor(gmail: GmailClient, classifier: AIClassifier, tracker: StatusTr
                             
                     except Exception as e:
                         print(f"   [WARN] Error: {e}")
+
+                written, write_reason = tracker.flush()
+                if not written:
+                    print(f"   [WARN] Could not write updates to the sheet: {write_reason}")
+                    processed = False
+
+            # Only move the saved historyId past emails that reached the sheet;
+            # otherwise the next poll fetches them again
+            if processed:
+                gmail.commit_history_id()
             
             last_check = datetime.now()
             time.sleep(interval)
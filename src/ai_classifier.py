@@ -2,25 +2,94 @@
 
 import json
 import re
-from dataclasses import dataclass
+import sqlite3
+from dataclasses import asdict, dataclass
 from typing import Optional
 
-from .config import GROQ_API_KEY
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+from .config import GROQ_API_KEY
+from .classifier_cache import ClassifierCache, cache_key
+
+# Role patterns tried in order by _extract_role_from_body
+ROLE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"position of\s+([A-Za-z\s\-\(\)]+?)(?:\s+at|\s+with|\.|,|\n)",
+        r"application for (?:the\s+)?([A-Za-z\s\-\(\)]+?)(?:\s+position|\s+role|\s+at|\.|,|\n)",
+        r"for the ([A-Za-z\s\-\(\)]+?)\s+position",
+    )
+]
+# Last resort: a capitalized job keyword, widened to the title-cased words around it
+# (case-sensitive, so "the hiring manager will reach out" is not a role)
+ROLE_KEYWORD_RE = re.compile(
+    r"\b(?:Engineer|Developer|Scientist|Analyst|Manager|Intern|Designer|Architect)s?\b"
+)
+ROLE_WINDOW_LEFT = 60
+ROLE_WINDOW_RIGHT = 20
+ROLE_MAX_LEFT_WORDS = 5
+JSON_OBJECT_RE = re.compile(r"\{[^{}]*\}", re.DOTALL)
+JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+WHITESPACE_RE = re.compile(r"\s+")
+
+# orjson is much faster on model output; both decoders raise ValueError subclasses
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def role_around_keyword(content: str) -> str:
+    """Role from the title-cased words around the first job keyword (bounded, no backtracking)."""
+    match = ROLE_KEYWORD_RE.search(content)
+    if not match:
+        return ""
 
-@dataclass
+    start = max(0, match.start() - ROLE_WINDOW_LEFT)
+    left = content[start:match.start()].split()
+    if start > 0 and left:
+        left = left[1:]  # may be cut mid-word
+    words = []
+    for token in reversed(left):
+        if len(words) == ROLE_MAX_LEFT_WORDS or not (token[0].isupper() and token.replace("-", "").isalpha()):
+            break
+        words.append(token)
+    words.reverse()
+    words.append(match.group())
+
+    end = match.end() + ROLE_WINDOW_RIGHT
+    right = content[match.end():end].split()
+    if end < len(content) and right:
+        right = right[:-1]  # may be cut mid-word
+    for token in right:
+        if not (token[0].isupper() or token[0] == "(") or not token.strip("()").replace("-", "").isalpha():
+            break
+        words.append(token)
+
+    role = " ".join(words)
+    if 5 < len(role) < 80:
+        return role.title() if role.islower() else role
+    return ""
+
+
+@dataclass(slots=True, frozen=True)
 class ClassificationResult:
-    """Result of email classification."""
+    """Result of email classification (immutable once built)."""
     company: str
     role: str
     status: str  # Applied, Assessment, Interview, Rejected
     confidence: float  # 0.0 - 1.0
     reasoning: str
-    reasoning: str
     source: str  # "ai" or "phrases"
     action_link: Optional[str] = None
 
 
+def _best_link(email: dict) -> Optional[str]:
+    """First action link found in the email, if any."""
+    action_links = email.get("action_links", [])
+    return action_links[0] if action_links else None
+
+
 class AIClassifier:
     """Groq-powered email classifier with model + phrase fallback."""
 
@@ -55,9 +124,42 @@ Body:
 Return ONLY valid JSON:
 {{"company": "company name", "role": "exact job title", "status": "Applied|Assessment|Interview|Rejected", "confidence": 0.9, "reasoning": "brief reason", "action_link": "url"}}"""
 
+    # Emails per Groq request in classify_batch (bodies trimmed to keep the prompt small)
+    BATCH_SIZE = 5
+    BATCH_BODY_CHARS = 800
+
+    BATCH_CLASSIFICATION_PROMPT = """Analyze these {count} job application emails and extract information for each.
+
+EXTRACT CAREFULLY (per email):
+1. COMPANY: The actual company name (not email platform like Workday, RippleHire)
+2. ROLE: The EXACT job title mentioned
+3. STATUS: Based on email content
+4. ACTION_LINK: The most relevant action link from the email.
+
+STATUS DETERMINATION:
+- Applied = application received / confirmed
+- Assessment = coding challenge / test
+- Interview = interview scheduled
+- Rejected = not moving forward
+
+{emails}
+
+Return ONLY a valid JSON array of {count} objects, one per email, in the same order:
+[{{"company": "company name", "role": "exact job title", "status": "Applied|Assessment|Interview|Rejected", "confidence": 0.9, "reasoning": "brief reason", "action_link": "url"}}]"""
+
+    BATCH_EMAIL_TEMPLATE = """EMAIL {number}:
+Subject: {subject}
+From: {sender}
+Body:
+{body}
+"""
+
     def __init__(self):
         self.client = None
+        self.cache = None
+        self._phrase_classifier = None
         self._init_client()
+        self._init_cache()
 
     def _init_client(self):
         if not GROQ_API_KEY:
@@ -71,17 +173,144 @@ Return ONLY valid JSON:
             print(f"Failed to import Groq client: {e}")
             self.client = None
 
+    def _init_cache(self):
+        # Only AI results are cached, so there is nothing to do without a client
+        if not self.client:
+            return
+
+        try:
+            self.cache = ClassifierCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Classification cache unavailable: {e}")
+            self.cache = None
+
+    def _from_cache(self, email: dict) -> Optional[ClassificationResult]:
+        if not self.cache:
+            return None
+        try:
+            data = self.cache.get(cache_key(email))
+        except sqlite3.Error as e:
+            print(f"Classification cache read failed: {e}")
+            return None
+        if not data:
+            return None
+        # The link isn't part of the cache key, so take it from this email
+        return ClassificationResult(**data, action_link=_best_link(email))
+
+    def _to_cache(self, email: dict, result: ClassificationResult):
+        if not self.cache:
+            return
+        data = asdict(result)
+        del data["action_link"]
+        try:
+            self.cache.set(cache_key(email), data)
+        except sqlite3.Error as e:
+            print(f"Classification cache write failed: {e}")
+
     def classify(self, email: dict) -> ClassificationResult:
         if self.client:
+            cached = self._from_cache(email)
+            if cached:
+                return cached
+
             try:
                 result = self._ai_classify(email)
                 if result:
+                    self._to_cache(email, result)
                     return result
             except Exception as e:
                 print(f"Groq classification failed: {e}")
 
         return self._phrase_classify(email)
 
+    def classify_batch(self, emails: list[dict]) -> list[ClassificationResult]:
+        """Classify emails in order, sending BATCH_SIZE emails per Groq request.
+
+        Cached emails are answered without a request. Any batch whose
+        response can't be matched up falls back to classify().
+        """
+        if not self.client:
+            return self._get_phrase_classifier().classify_batch(emails)
+
+        results = [self._from_cache(email) for email in emails]
+        misses = [i for i, result in enumerate(results) if result is None]
+
+        for start in range(0, len(misses), self.BATCH_SIZE):
+            indices = misses[start:start + self.BATCH_SIZE]
+            chunk = [emails[i] for i in indices]
+            batch_results = None
+            if len(chunk) > 1:
+                try:
+                    batch_results = self._ai_classify_batch(chunk)
+                except Exception as e:
+                    print(f"Groq batch classification failed: {e}")
+
+            if batch_results is None:
+                batch_results = [self.classify(email) for email in chunk]
+            else:
+                for email, result in zip(chunk, batch_results):
+                    self._to_cache(email, result)
+
+            for i, result in zip(indices, batch_results):
+                results[i] = result
+        return results
+
+    def _ai_classify_batch(self, emails: list[dict]) -> Optional[list[ClassificationResult]]:
+        sections = "\n".join(
+            self.BATCH_EMAIL_TEMPLATE.format(
+                number=number,
+                subject=email.get("subject", ""),
+                sender=email.get("from", ""),
+                body=email.get("body", "")[:self.BATCH_BODY_CHARS]
+            )
+            for number, email in enumerate(emails, start=1)
+        )
+        prompt = self.BATCH_CLASSIFICATION_PROMPT.format(count=len(emails), emails=sections)
+
+        for model in self.MODELS:
+            try:
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "Extract job application details. Return ONLY a valid JSON array."},
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.0,
+                    max_tokens=300 * len(emails),
+                )
+
+                content = response.choices[0].message.content
+                if not content:
+                    continue
+
+                items = self._parse_json_array(content)
+                if not items or len(items) != len(emails) or not all(isinstance(i, dict) for i in items):
+                    continue
+
+                return [
+                    self._build_result(data, email, model)
+                    for data, email in zip(items, emails)
+                ]
+
+            except Exception as e:
+                print(f"[Groq] Model failed: {model} → {e}")
+                continue
+
+        return None
+
+    def _parse_json_array(self, content: str) -> Optional[list]:
+        try:
+            data = _json_loads(content)
+        except ValueError:
+            match = JSON_ARRAY_RE.search(content)
+            if not match:
+                return None
+            try:
+                data = _json_loads(match.group())
+            except ValueError:
+                return None
+        return data if isinstance(data, list) else None
+
     def _ai_classify(self, email: dict) -> Optional[ClassificationResult]:
         body = email.get("body", "")[:3000]
         subject = email.get("subject", "")
@@ -123,16 +352,15 @@ Return ONLY valid JSON:
         return None
 
     def _parse_json(self, content: str) -> Optional[dict]:
-        content = content.strip()
         try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            match = re.search(r"\{[^{}]*\}", content, re.DOTALL)
+            return _json_loads(content)
+        except ValueError:
+            match = JSON_OBJECT_RE.search(content)
             if not match:
                 return None
             try:
-                return json.loads(match.group())
-            except json.JSONDecodeError:
+                return _json_loads(match.group())
+            except ValueError:
                 return None
 
     def _build_result(self, data: dict, email: dict, model: str) -> ClassificationResult:
@@ -152,10 +380,6 @@ Return ONLY valid JSON:
                 email.get("subject", "")
             )
 
-        # Get action links from email
-        action_links = email.get("action_links", [])
-        best_link = action_links[0] if action_links else None
-
         return ClassificationResult(
             company=company,
             role=role if role else "Unknown Position",
@@ -163,29 +387,27 @@ Return ONLY valid JSON:
             confidence=float(data.get("confidence", 0.8)),
             reasoning=f"{data.get('reasoning', 'Groq classification')} (model={model})",
             source="ai",
-            action_link=best_link
+            action_link=_best_link(email)
         )
 
 
     def _extract_role_from_body(self, body: str, subject: str) -> str:
         content = f"{subject} {body}"
 
-        patterns = [
-            r"position of\s+([A-Za-z\s\-\(\)]+?)(?:\s+at|\s+with|\.|,|\n)",
-            r"application for (?:the\s+)?([A-Za-z\s\-\(\)]+?)(?:\s+position|\s+role|\s+at|\.|,|\n)",
-            r"for the ([A-Za-z\s\-\(\)]+?)\s+position",
-            r"([A-Za-z\s\-]+(?:Engineer|Developer|Scientist|Analyst|Manager|Intern|Designer|Architect)[A-Za-z\s\-\(\)]*)",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
+        for pattern in ROLE_PATTERNS:
+            match = pattern.search(content)
             if match:
-                role = re.sub(r"\s+", " ", match.group(1).strip())
+                role = WHITESPACE_RE.sub(" ", match.group(1).strip())
                 if 5 < len(role) < 80:
                     return role.title() if role.islower() else role
 
-        return ""
+        return role_around_keyword(content)
+
+    def _get_phrase_classifier(self):
+        if self._phrase_classifier is None:
+            from .phrase_classifier import PhraseClassifier
+            self._phrase_classifier = PhraseClassifier()
+        return self._phrase_classifier
 
     def _phrase_classify(self, email: dict) -> ClassificationResult:
-        from .phrase_classifier import PhraseClassifier
-        return PhraseClassifier().classify(email)
+        return self._get_phrase_classifier().classify(email)
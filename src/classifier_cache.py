@@ -0,0 +1,59 @@
+"""SQLite-backed cache of AI classification results."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import CLASSIFIER_CACHE_PATH
+
+# Entries older than this are ignored and pruned when the cache is opened
+CACHE_TTL = 30 * 24 * 60 * 60  # seconds
+
+
+def cache_key(email: dict) -> str:
+    """Hash the parts of an email that determine its classification."""
+    content = "\0".join((
+        email.get("subject", ""),
+        email.get("sender_domain", ""),
+        email.get("body", "")[:2000],
+    ))
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ClassifierCache:
+    """Persistent key -> classification dict store (safe to share across threads)."""
+
+    def __init__(self, path: Path = CLASSIFIER_CACHE_PATH, ttl: float = CACHE_TTL):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS classifications "
+                "(key TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "DELETE FROM classifications WHERE created < ?", (time.time() - ttl,)
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM classifications WHERE key = ? AND created >= ?",
+                (key, time.time() - self._ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, result: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications (key, result, created) VALUES (?, ?, ?)",
+                (key, json.dumps(result), time.time()),
+            )
+            self._conn.commit()
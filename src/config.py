@@ -1,9 +1,15 @@
 """Configuration management for Application Tracker."""
 
 import os
+import re
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Load environment variables
 load_dotenv()
 
@@ -18,10 +24,14 @@ if IS_VERCEL:
     # On Vercel, use /tmp for writable credentials
     TOKEN_PATH = Path("/tmp/token.json")
     CREDENTIALS_PATH = Path("/tmp/credentials.json")
+    CLASSIFIER_CACHE_PATH = Path("/tmp/classifier_cache.db")
+    HISTORY_PATH = Path("/tmp/history.json")
 else:
     # Local development
     TOKEN_PATH = CREDENTIALS_DIR / "token.json"
     CREDENTIALS_PATH = CREDENTIALS_DIR / "credentials.json"
+    CLASSIFIER_CACHE_PATH = CREDENTIALS_DIR / "classifier_cache.db"
+    HISTORY_PATH = CREDENTIALS_DIR / "history.json"
 
 
 # Gmail API scopes
@@ -191,8 +201,53 @@ POSITIVE_PHRASES = [
 ]
 
 
-# Job application email query - BROAD: Keywords in subject, exclude user's own emails
-JOB_EMAIL_QUERY = 'subject:(application OR applied OR interview OR assessment OR position OR role OR confirmed OR received OR resume OR thank OR opportunity OR update OR unfortunately OR regret OR "not to progress" OR "status update") -from:me'
+def _build_automaton(phrases: list[str]):
+    """Build an Aho-Corasick automaton over phrases (None if pyahocorasick is missing).
+
+    Values are (list_index, phrase) so callers can keep first-in-list-wins order.
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for index, phrase in enumerate(phrases):
+        if phrase not in automaton:
+            automaton.add_word(phrase, (index, phrase))
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_pattern(phrases: list[str]):
+    """Compile phrases into one alternation regex, used when pyahocorasick is missing."""
+    if ahocorasick is not None or not phrases:
+        return None
+    return re.compile("|".join(map(re.escape, phrases)))
+
 
-# Clean up the query
-JOB_EMAIL_QUERY = " ".join(JOB_EMAIL_QUERY.split())
+# One-pass multi-phrase matchers for the email filter
+IGNORED_AC = _build_automaton(IGNORED_SENDERS)
+NEG_AC = _build_automaton(NEGATIVE_SUBJECTS)
+POS_AC = _build_automaton(POSITIVE_PHRASES)
+
+# Regex fallbacks for the same lists (None when the automatons are available)
+IGNORED_RE = _build_pattern(IGNORED_SENDERS)
+NEG_RE = _build_pattern(NEGATIVE_SUBJECTS)
+POS_RE = _build_pattern(POSITIVE_PHRASES)
+
+
+# Subject keywords for job application emails (Gmail search and the history filter)
+JOB_SUBJECT_KEYWORDS = (
+    "application", "applied", "interview", "assessment", "position", "role",
+    "confirmed", "received", "resume", "thank", "opportunity", "update",
+    "unfortunately", "regret", "not to progress", "status update",
+)
+
+# Job application email query - BROAD: Keywords in subject, exclude user's own emails
+JOB_EMAIL_QUERY = "subject:({}) -from:me".format(" OR ".join(
+    f'"{keyword}"' if " " in keyword else keyword for keyword in JOB_SUBJECT_KEYWORDS
+))
+
+# Local equivalent of the subject: clause, for messages not found via search
+JOB_SUBJECT_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in JOB_SUBJECT_KEYWORDS) + r")\b",
+    re.IGNORECASE
+)
@@ -1,27 +1,114 @@
 """Gmail API client for fetching job application emails."""
 
 import base64
+import json
 import re
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Iterator, Optional
 from email.utils import parsedate_to_datetime
-from bs4 import BeautifulSoup
-
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from selectolax.lexbor import LexborHTMLParser
 
 from .config import (
     ALL_SCOPES,
     TOKEN_PATH,
     CREDENTIALS_PATH,
+    HISTORY_PATH,
     IGNORED_SENDERS,
     NEGATIVE_SUBJECTS,
     POSITIVE_PHRASES,
+    IGNORED_AC,
+    NEG_AC,
+    POS_AC,
+    IGNORED_RE,
+    NEG_RE,
+    POS_RE,
     JOB_EMAIL_QUERY,
+    JOB_SUBJECT_RE,
+)
+
+# Precompiled patterns for HTML fallback and header parsing
+SCRIPT_TAG_RE = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+STYLE_TAG_RE = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL | re.IGNORECASE)
+BR_TAG_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+P_CLOSE_RE = re.compile(r'</p>', re.IGNORECASE)
+ANY_TAG_RE = re.compile(r'<[^>]+>')
+WHITESPACE_RE = re.compile(r'\s+')
+ANGLE_EMAIL_RE = re.compile(r"<(.+?)>")
+
+# Link text that marks an action link (start test, schedule, ...)
+ACTION_LINK_KEYWORDS = (
+    "start test", "start assessment", "take the test", "take test",
+    "coding challenge", "hackerrank", "codility", "codesignal",
+    "schedule interview", "schedule a call", "book a time",
+    "view application", "check status", "accept offer", "sign offer"
 )
 
+ACTION_LINK_TEXT_RE = re.compile("|".join(map(re.escape, ACTION_LINK_KEYWORDS)))
+
+# Enough candidates for _build_result, which only uses the first
+MAX_ACTION_LINKS = 8
+
+# URL patterns for action links (when text is generic/missing)
+ACTION_LINK_URL_PATTERNS = (
+    "hackerrank.com/test/",
+    "hackerrank.com/tests/",
+    "codility.com/test/",
+    "codesignal.com/test/",
+    "hirevue.com/interview/",
+    "calendly.com",
+)
+
+# Body text kept per email (the AI classifier reads at most 3000 chars)
+MAX_BODY_CHARS = 4000
+
+# A text/plain part at least this long makes the HTML text redundant
+MIN_PLAIN_CHARS = 500
+
+# Two-label public suffixes seen on sender domains (the label before them names the company)
+MULTI_LABEL_SUFFIXES = frozenset({
+    "co.uk", "org.uk", "ac.uk", "com.au", "net.au", "co.in", "net.in",
+    "co.jp", "com.br", "co.nz", "com.sg", "co.za", "com.mx", "com.cn",
+})
+
+# Gmail recommends at most 50 calls per batch request to avoid rate limiting
+GMAIL_BATCH_SIZE = 50
+
+# Message ids requested per messages.list page
+GMAIL_PAGE_SIZE = 100
+
+# History entries with these labels are never job emails (-from:me, and what
+# search leaves out by default); any other label, archived or not, is kept
+HISTORY_SKIP_LABELS = frozenset({"SENT", "DRAFT", "SPAM", "TRASH"})
+
+
+@lru_cache(maxsize=1024)
+def domain_label(host: str) -> str:
+    """Registrable name of a host, title-cased: notifications.workday.com -> Workday."""
+    labels = host.lower().rstrip(".").split(".")
+    if len(labels) < 2:
+        return labels[0].title()
+    if len(labels) >= 3 and ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES:
+        return labels[-3].title()
+    return labels[-2].title()
+
+
+def first_phrase(automaton, phrases: list[str], text: str, pattern=None) -> Optional[str]:
+    """Return the earliest-listed phrase found in text, or None.
+
+    Uses a single Aho-Corasick pass when available. Otherwise the regex
+    alternation rules out misses in one scan, and only hits walk the list
+    to find the earliest-listed phrase.
+    """
+    if automaton is not None:
+        return min((hit for _, hit in automaton.iter(text)), default=(None, None))[1]
+    if pattern is not None and not pattern.search(text):
+        return None
+    for phrase in phrases:
+        if phrase in text:
+            return phrase
+    return None
+
 
 class GmailClient:
     """Client for interacting with Gmail API."""
@@ -29,10 +116,17 @@ class GmailClient:
     def __init__(self):
         self.service = None
         self.creds = None
+        self._pending_history_id = None  # Reached by the last incremental poll, not yet saved
         self._authenticate()
 
     def _authenticate(self):
         """Authenticate with Gmail API using OAuth2."""
+        # Google client libraries are slow to import; load them only when connecting
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         if TOKEN_PATH.exists():
             self.creds = Credentials.from_authorized_user_file(str(TOKEN_PATH), ALL_SCOPES)
 
@@ -57,37 +151,51 @@ class GmailClient:
 
         self.service = build("gmail", "v1", credentials=self.creds)
 
-    def _check_email(self, sender_email: str, subject: str, body: str = "") -> tuple[bool, str]:
+    def _check_email(self, email_data: dict) -> tuple[bool, str]:
         """
         Smart filtering logic that returns (should_keep, detection_reason).
-        
+
+        Reads the subject_lower/body_lower fields set by _parse_message.
+
         Returns:
             (True, reason) if email should be KEPT
             (False, reason) if email should be BLOCKED
         """
-        sender_lower = sender_email.lower()
-        subject_lower = subject.lower()
-        body_lower = body.lower()
-        combined = f"{subject_lower} {body_lower}"
-        
+        return (
+            self._check_headers(email_data.get("sender_email", ""), email_data.get("subject", ""))
+            or self._check_body(email_data.get("subject_lower", ""), email_data.get("body_lower", ""))
+        )
+
+    def _check_headers(self, sender_email: str, subject: str) -> Optional[tuple[bool, str]]:
+        """
+        Filtering decisions that need only the From/Subject headers.
+
+        Returns (False, reason) if the email is blocked, or None if the body
+        is needed to decide (a positive phrase can override a negative subject).
+        """
         # Check ignored senders FIRST (these are always blocked)
-        for ignored in IGNORED_SENDERS:
-            if ignored in sender_lower:
-                return (False, f"Blocked sender: {ignored}")
-        
-        # Check negative subjects
-        for phrase in NEGATIVE_SUBJECTS:
-            if phrase in subject_lower:
-                # Check if a positive phrase overrides
-                for pos_phrase in POSITIVE_PHRASES:
-                    if pos_phrase in combined:
-                        return (True, f"Kept: '{pos_phrase}' (overrode '{phrase}')")
-                return (False, f"Blocked subject: {phrase}")
+        ignored = first_phrase(IGNORED_AC, IGNORED_SENDERS, sender_email.lower(), IGNORED_RE)
+        if ignored:
+            return (False, f"Blocked sender: {ignored}")
+        return None
+
+    def _check_body(self, subject_lower: str, body_lower: str) -> tuple[bool, str]:
+        """Phrase checks over the lowercased subject and body, for emails that passed _check_headers."""
+        positive = (
+            first_phrase(POS_AC, POSITIVE_PHRASES, subject_lower, POS_RE)
+            or first_phrase(POS_AC, POSITIVE_PHRASES, body_lower, POS_RE)
+        )
+
+        # Check negative subjects (a positive phrase overrides)
+        negative = first_phrase(NEG_AC, NEGATIVE_SUBJECTS, subject_lower, NEG_RE)
+        if negative:
+            if positive:
+                return (True, f"Kept: '{positive}' (overrode '{negative}')")
+            return (False, f"Blocked subject: {negative}")
         
         # Check for POSITIVE phrases
-        for phrase in POSITIVE_PHRASES:
-            if phrase in combined:
-                return (True, f"Matched: {phrase}")
+        if positive:
+            return (True, f"Matched: {positive}")
         
         # Default: BLOCK if no positive signal found (strict filtering)
         return (False, "Blocked: no positive job signal")
@@ -98,12 +206,74 @@ class GmailClient:
         days_back: int = 7,
         max_results: int = 500,  # Increased from 100 to capture more emails
         after_date: Optional[datetime] = None,
-        return_skipped: bool = False
+        return_skipped: bool = False,
+        incremental: bool = False
     ) -> list[dict] | tuple[list[dict], list[dict]]:
 
         """
         Fetch job application emails using JOB_EMAIL_QUERY from config.
+
+        With incremental=True, only messages added since the last saved
+        historyId are fetched (see iter_messages).
+        """
+        all_emails = []
+        skipped_emails = []
+
+        try:
+            for email_data in self.iter_messages(
+                days_back=days_back,
+                max_results=max_results,
+                after_date=after_date,
+                skipped=skipped_emails if return_skipped else None,
+                incremental=incremental
+            ):
+                all_emails.append(email_data)
+        except Exception as e:
+            # Keep whatever pages were already processed
+            print(f"Error fetching messages: {e}")
+
+        if return_skipped:
+            return all_emails, skipped_emails
+        return all_emails
+
+    def iter_messages(
+        self,
+        days_back: int = 7,
+        max_results: int = 500,
+        after_date: Optional[datetime] = None,
+        skipped: Optional[list[dict]] = None,
+        incremental: bool = False
+    ) -> Iterator[dict]:
         """
+        Yield kept job application emails page by page.
+
+        Each page of up to GMAIL_PAGE_SIZE ids is filtered and fetched before
+        the next page is listed. Blocked emails are appended to ``skipped``
+        when a list is given.
+
+        With incremental=True and a saved historyId, messages are read from
+        users.history.list instead of the date-bounded search. The search is
+        still used on cold start (or when the saved id has expired). Once all
+        pages have been processed the new historyId is held until the caller
+        has stored the emails and calls commit_history_id(). A search cut
+        short by max_results records nothing, so the next poll searches again
+        rather than skipping the rest.
+        """
+        if incremental:
+            self._pending_history_id = None
+            history_id = self._load_history_id()
+            if history_id:
+                from googleapiclient.errors import HttpError
+                try:
+                    yield from self._iter_history(history_id, skipped)
+                    return
+                except HttpError as e:
+                    if e.resp.status != 404:
+                        raise
+                    # Saved historyId is too old: fall back to a full search
+                    print("Saved Gmail historyId expired, running full search")
+            start_history_id = self.get_history_id()
+
         # Build date query
         if after_date:
             date_cutoff = after_date.strftime('%Y/%m/%d')
@@ -113,60 +283,206 @@ class GmailClient:
         # Use the query from config.py (not hardcoded)
         query = f'after:{date_cutoff} {JOB_EMAIL_QUERY}'
 
-        try:
-            results = self.service.users().messages().list(
-                userId="me",
-                q=query,
-                maxResults=max_results
-            ).execute()
-
-            messages = results.get("messages", [])
-            all_emails = []
-            skipped_emails = []
-            
-            for msg in messages:
-                email_data = self.get_message_details(msg["id"])
-                if email_data:
-                    # Smart filter: returns (should_keep, detection_reason)
-                    should_keep, detection_reason = self._check_email(
-                        email_data.get("sender_email", ""),
-                        email_data.get("subject", ""),
-                        email_data.get("body", "")
-                    )
-                    if should_keep:
-                        email_data["detection_reason"] = detection_reason
-                        all_emails.append(email_data)
-                    else:
-                        if return_skipped:
-                            skipped_emails.append({
-                                "subject": email_data.get("subject"),
-                                "sender": email_data.get("sender_email"),
-                                "reason": detection_reason
-                            })
-
-                    
-            if return_skipped:
-                return all_emails, skipped_emails
-            return all_emails
+        messages_api = self.service.users().messages()
+        remaining = max_results
+        request = messages_api.list(
+            userId="me",
+            q=query,
+            maxResults=min(GMAIL_PAGE_SIZE, remaining)
+        )
+        complete = True
+        while request is not None and remaining > 0:
+            response = request.execute()
+            page = response.get("messages", [])
+            messages = page[:remaining]
+            complete = len(page) <= remaining
+            remaining -= len(messages)
+            yield from self._hydrate(messages, skipped)
+            request = messages_api.list_next(request, response)
+
+        if incremental and start_history_id and complete and request is None:
+            self._pending_history_id = start_history_id
+
+    def _iter_history(
+        self,
+        start_history_id: str,
+        skipped: Optional[list[dict]] = None
+    ) -> Iterator[dict]:
+        """Yield kept emails for messages added since start_history_id.
+
+        Every added message is processed (no max_results cap), since the new
+        historyId moves past all of them. Like JOB_EMAIL_QUERY, this covers
+        all mail rather than just the inbox. Its other filters are applied
+        locally: HISTORY_SKIP_LABELS here, subject keywords in _hydrate.
+        """
+        history_api = self.service.users().history()
+        request = history_api.list(
+            userId="me",
+            startHistoryId=start_history_id,
+            historyTypes=["messageAdded"]
+        )
+        seen = set()
+        messages = []
+        latest_history_id = start_history_id
+        while request is not None:
+            response = request.execute()
+            latest_history_id = response.get("historyId", latest_history_id)
+            for record in response.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message = added["message"]
+                    message_id = message["id"]
+                    if not HISTORY_SKIP_LABELS.isdisjoint(message.get("labelIds", ())):
+                        continue
+                    if message_id not in seen:
+                        seen.add(message_id)
+                        messages.append({"id": message_id})
+            request = history_api.list_next(request, response)
+
+        for start in range(0, len(messages), GMAIL_PAGE_SIZE):
+            yield from self._hydrate(
+                messages[start:start + GMAIL_PAGE_SIZE], skipped, match_subject=True
+            )
+
+        self._pending_history_id = latest_history_id
+
+    def commit_history_id(self):
+        """Save the historyId reached by the last incremental poll.
+
+        Call this only once that poll's emails are stored. Until then the
+        next poll reads them again from the previously saved historyId.
+        """
+        if self._pending_history_id:
+            self._save_history_id(self._pending_history_id)
+            self._pending_history_id = None
 
-        except Exception as e:
-            print(f"Error fetching messages: {e}")
-            if return_skipped:
-                return [], []
-            return []
+    def _load_history_id(self) -> Optional[str]:
+        """Return the historyId saved by the last incremental poll, if any."""
+        try:
+            with open(HISTORY_PATH) as f:
+                return json.load(f).get("last_history_id")
+        except (OSError, ValueError):
+            return None
 
+    def _save_history_id(self, history_id: str):
+        try:
+            HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(HISTORY_PATH, "w") as f:
+                json.dump({"last_history_id": str(history_id)}, f)
+        except OSError as e:
+            print(f"Warning: could not save Gmail historyId: {e}")
 
-    def get_message_details(self, message_id: str) -> dict:
-        """Get full details of a specific email."""
+    def _hydrate(
+        self,
+        messages: list[dict],
+        skipped: Optional[list[dict]] = None,
+        match_subject: bool = False
+    ) -> Iterator[dict]:
+        """Filter and fetch one page of listed message ids, yielding kept emails.
+
+        match_subject applies JOB_EMAIL_QUERY's subject keywords, for ids that
+        did not come from a search.
+        """
+        # Cheap header-only pass first: blocked senders never need a full download
+        message_ids = [msg["id"] for msg in messages]
+        metadata = self._batch_get_messages(
+            message_ids, format="metadata", metadataHeaders=["From", "Subject"]
+        )
+        survivors = []
+        for message_id, meta in zip(message_ids, metadata):
+            header_dict = self._header_dict(meta) if meta else {}
+            if match_subject and not JOB_SUBJECT_RE.search(header_dict.get("subject", "")):
+                continue  # The search would not have listed it either
+            sender_email = self._extract_email(header_dict.get("from", ""))
+            verdict = self._check_headers(sender_email, header_dict.get("subject", ""))
+            if verdict is None:
+                survivors.append(message_id)
+            elif skipped is not None:
+                skipped.append({
+                    "subject": header_dict.get("subject"),
+                    "sender": sender_email,
+                    "reason": verdict[1]
+                })
+
+        raw_messages = self._batch_get_messages(survivors)
+        for message_id, raw in zip(survivors, raw_messages):
+            email_data = self._parse_message(message_id, raw) if raw else {}
+            if not email_data:
+                continue
+
+            # Smart filter: returns (should_keep, detection_reason)
+            should_keep, detection_reason = self._check_email(email_data)
+            if should_keep:
+                email_data["detection_reason"] = detection_reason
+                yield email_data
+            elif skipped is not None:
+                skipped.append({
+                    "subject": email_data.get("subject"),
+                    "sender": email_data.get("sender_email"),
+                    "reason": detection_reason
+                })
+
+
+    def _batch_get_messages(self, message_ids: list[str], **get_kwargs) -> list[Optional[dict]]:
+        """Fetch messages via Gmail batch HTTP requests, preserving order.
+
+        get_kwargs are passed to messages().get (default format="full").
+        Entries are None for messages that failed to fetch.
+        """
+        get_kwargs.setdefault("format", "full")
+        messages = [None] * len(message_ids)
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                print(f"Error getting message details: {exception}")
+                return
+            messages[int(request_id)] = response
+
+        for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for index in range(start, min(start + GMAIL_BATCH_SIZE, len(message_ids))):
+                batch.add(
+                    self.service.users().messages().get(
+                        userId="me", id=message_ids[index], **get_kwargs
+                    ),
+                    request_id=str(index)
+                )
+            try:
+                batch.execute()
+            except Exception as e:
+                # Batch endpoint rejected the call: fetch this chunk one by one
+                print(f"Batch fetch failed, falling back to single requests: {e}")
+                for index in range(start, min(start + GMAIL_BATCH_SIZE, len(message_ids))):
+                    if messages[index] is None:
+                        messages[index] = self._get_message(message_ids[index], **get_kwargs)
+
+        return messages
+
+    def _get_message(self, message_id: str, **get_kwargs) -> Optional[dict]:
+        get_kwargs.setdefault("format", "full")
         try:
-            message = self.service.users().messages().get(
+            return self.service.users().messages().get(
                 userId="me",
                 id=message_id,
-                format="full"
+                **get_kwargs
             ).execute()
+        except Exception as e:
+            print(f"Error getting message details: {e}")
+            return None
+
+    def get_message_details(self, message_id: str) -> dict:
+        """Get full details of a specific email."""
+        message = self._get_message(message_id)
+        return self._parse_message(message_id, message) if message else {}
 
-            headers = message.get("payload", {}).get("headers", [])
-            header_dict = {h["name"].lower(): h["value"] for h in headers}
+    def _header_dict(self, message: dict) -> dict:
+        """Lowercased header name -> value for a Gmail message resource."""
+        headers = message.get("payload", {}).get("headers", [])
+        return {h["name"].lower(): h["value"] for h in headers}
+
+    def _parse_message(self, message_id: str, message: dict) -> dict:
+        """Turn a Gmail API message resource into our email dict."""
+        try:
+            header_dict = self._header_dict(message)
 
             # Parse date
             date_str = header_dict.get("date", "")
@@ -175,7 +491,7 @@ class GmailClient:
             except Exception:
                 email_date = datetime.now()
 
-            # Extract body and links using robust BS4 method
+            # Extract body and links from the MIME parts
             body, action_links = self._extract_body_and_links(message.get("payload", {}))
 
 
@@ -184,14 +500,18 @@ class GmailClient:
             sender_email = self._extract_email(from_header)
             sender_domain = self._extract_domain(sender_email)
 
+            subject = header_dict.get("subject", "")
+
             return {
                 "id": message_id,
-                "subject": header_dict.get("subject", ""),
+                "subject": subject,
+                "subject_lower": subject.lower(),
                 "from": from_header,
                 "sender_email": sender_email,
                 "sender_domain": sender_domain,
                 "date": email_date,
                 "body": body,
+                "body_lower": body.lower(),
                 "action_links": action_links,
                 "snippet": message.get("snippet", ""),
 
@@ -209,83 +529,77 @@ class GmailClient:
         def decode_part(part):
             if 'data' not in part.get('body', {}):
                 return ""
-            data = part['body']['data'].replace('-', '+').replace('_', '/')
+            data = part['body']['data']
             try:
-                return base64.b64decode(data).decode('utf-8', errors='ignore')
+                # Gmail sends unpadded base64url; restore padding before decoding
+                return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4)).decode('utf-8', errors='ignore')
             except Exception:
                 return ""
         
         text = ""
         links = []
 
-        # Helper to extract links from HTML
-        def extract_action_links(html_content):
-            found_links = []
-            try:
-                soup = BeautifulSoup(html_content, 'html.parser')
-                for a in soup.find_all('a', href=True):
-                    href = a['href']
-                    text_content = a.get_text().strip().lower()
-                    
-                    # Keywords for action links
-                    keywords = [
-                        "start test", "start assessment", "take the test", "take test",
-                        "coding challenge", "hackerrank", "codility", "codesignal",
-                        "schedule interview", "schedule a call", "book a time",
-                        "view application", "check status", "accept offer", "sign offer"
-                    ]
-                    
-                    # URL patterns for action links (when text is generic/missing)
-                    url_patterns = [
-                        "hackerrank.com/test/",
-                        "hackerrank.com/tests/",
-                        "codility.com/test/",
-                        "codesignal.com/test/",
-                        "hirevue.com/interview/",
-                        "calendly.com",
-                    ]
-                    
-                    if any(k in text_content for k in keywords) or any(p in href.lower() for p in url_patterns):
-                        found_links.append(href)
-
-            except Exception:
-                pass
-            return found_links
-
-        # Try parts first
+        # Try parts first: text/plain is preferred, HTML is still parsed for links
         if 'parts' in payload:
-            for part in payload['parts']:
-                mime = part.get('mimeType', '')
-                if mime == 'text/plain':
+            parts = payload['parts']
+            for part in parts:
+                if part.get('mimeType', '') == 'text/plain':
                     text += decode_part(part) + "\n"
-                elif mime == 'text/html':
+                    if len(text) >= MAX_BODY_CHARS:
+                        break
+            for part in parts:
+                if part.get('mimeType', '') == 'text/html':
                     html = decode_part(part)
                     if html:
-                        # Extract links BEFORE stripping
-                        links.extend(extract_action_links(html))
-                        
-                        # Strip HTML tags + clean whitespace
-                        try:
-                            soup = BeautifulSoup(html, 'html.parser')
-                            text += ' '.join(soup.get_text().split()) + "\n"
-                        except Exception:
-                            text += self._html_to_text(html) + "\n"
+                        want_text = len(text) < MIN_PLAIN_CHARS
+                        html_text, html_links = self._parse_html(html, want_text)
+                        links.extend(html_links)
+                        if want_text:
+                            text += html_text + "\n"
         
         # Fallback to body if no parts or empty text
         if not text and 'body' in payload and 'data' in payload['body']:
             content = decode_part(payload)
             # If it looks like HTML, clean it
             if '<html' in content.lower() or '<body' in content.lower() or '<div' in content.lower():
-                links.extend(extract_action_links(content))
-                try:
-                    soup = BeautifulSoup(content, 'html.parser')
-                    text = ' '.join(soup.get_text().split())
-                except Exception:
-                    text = self._html_to_text(content)
+                text, html_links = self._parse_html(content)
+                links.extend(html_links)
             else:
                 text = content
         
-        return text.strip(), list(set(links))  # Dedup links
+        return text[:MAX_BODY_CHARS].strip(), list(dict.fromkeys(links))[:MAX_ACTION_LINKS]  # Dedup, keep order
+
+    def _parse_html(self, html: str, want_text: bool = True) -> tuple[str, list[str]]:
+        """
+        Parse HTML once and return (clean_text, action_links).
+
+        clean_text is "" when want_text is False. Falls back to regex
+        stripping (and no links) if parsing fails.
+        """
+        try:
+            tree = LexborHTMLParser(html)
+        except Exception:
+            return (self._html_to_text(html) if want_text else ""), []
+
+        links = []
+        seen = set()
+        for a in tree.css('a[href]'):
+            href = a.attributes.get('href') or ''
+            if href in seen:
+                continue
+            if (ACTION_LINK_TEXT_RE.search(a.text().lower()) or
+                    any(p in href.lower() for p in ACTION_LINK_URL_PATTERNS)):
+                seen.add(href)
+                links.append(href)
+                if len(links) >= MAX_ACTION_LINKS:
+                    break
+
+        if not want_text:
+            return "", links
+
+        # Strip HTML tags + clean whitespace
+        tree.strip_tags(['script', 'style'])
+        return ' '.join(tree.text(separator=' ').split()), links
 
     def _extract_body(self, payload: dict) -> str:
         """Legacy wrapper for backward compatibility."""
@@ -296,22 +610,22 @@ class GmailClient:
     def _html_to_text(self, html: str) -> str:
         """Simple HTML to text conversion (fallback)."""
         # Remove scripts and styles
-        text = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-        text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
+        text = SCRIPT_TAG_RE.sub('', html)
+        text = STYLE_TAG_RE.sub('', text)
         # Replace br and p tags with newlines
-        text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
-        text = re.sub(r'</p>', '\n', text, flags=re.IGNORECASE)
+        text = BR_TAG_RE.sub('\n', text)
+        text = P_CLOSE_RE.sub('\n', text)
         # Remove all other tags
-        text = re.sub(r'<[^>]+>', ' ', text)
+        text = ANY_TAG_RE.sub(' ', text)
         # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = WHITESPACE_RE.sub(' ', text).strip()
         # Decode HTML entities
         text = text.replace('&nbsp;', ' ').replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
         return text
 
     def _extract_email(self, from_header: str) -> str:
         """Extract email address from From header."""
-        match = re.search(r"<(.+?)>", from_header)
+        match = ANGLE_EMAIL_RE.search(from_header)
         if match:
             return match.group(1)
         if "@" in from_header:
@@ -321,7 +635,7 @@ class GmailClient:
     def _extract_domain(self, email: str) -> str:
         """Extract domain from email address."""
         if "@" in email:
-            return email.split("@")[1].split(".")[0].title()
+            return domain_label(email.rsplit("@", 1)[1])
         return ""
 
     def get_history_id(self) -> str:
@@ -1,22 +1,163 @@
 """Phrase-based email classification (fallback classifier)."""
 
 import re
-from .ai_classifier import ClassificationResult
+from typing import Optional
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+from .ai_classifier import ClassificationResult, role_around_keyword
+
+# Rule priority: Rejected > Interview > Assessment > Applied
+STATUS_ORDER = ("Rejected", "Interview", "Assessment", "Applied")
+
+# A rule alternative with no regex syntax (plain words, spaces, hyphens)
+_LITERAL_ALT_RE = re.compile(r"[a-z0-9][a-z0-9 \-]*[a-z0-9]")
+_RULE_GROUP_RE = re.compile(r"\\b\((.*)\)\\b")
+
+# Company / role extraction patterns, compiled once
+_COMPANY_PATTERNS = [
+    re.compile(p)
+    for p in (
+        r"(?:at|with|from|here at)\s+([A-Z][a-zA-Z0-9]+(?:\s+[A-Z][a-zA-Z0-9]+)?)",
+        r"([A-Z][a-zA-Z0-9]+(?:\s+[A-Z][a-zA-Z0-9]+)?)\s+(?:team|talent|careers|recruiting)",
+        r"interest in (?:the\s+)?(?:\w+\s+)?(?:position|role)?\s*(?:at|with)\s+([A-Z][a-zA-Z0-9]+)",
+    )
+]
+_SUBJECT_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"application\s+(?:to|for)\s+([A-Z][a-zA-Z0-9]+(?:\s+[A-Z][a-zA-Z0-9]+)?)",
+        r"your\s+(?:job\s+)?application\s+(?:at|with|to)\s+([A-Z][a-zA-Z0-9]+(?:\s+[A-Z][a-zA-Z0-9]+)?)",
+    )
+]
+_ROLE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"position of\s+([A-Za-z\s\-\(\)]+?)(?:\s+at|\s+with|\.|,|\n)",
+        r"for the\s+([A-Za-z\s\-\(\)]+?)\s+(?:position|role)",
+        r"application for (?:the\s+)?([A-Za-z\s\-\(\)]+?)(?:\s+position|\s+role|\s+at|\.|,|\n)",
+    )
+]
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Extensive blacklist of generic terms often mistaken for company names
+_BLACKLIST = frozenset([
+    "the", "a", "an", "our", "your", "hey", "hi", "dear", "us", "me",
+    "hire", "hiring", "careers", "recruiting", "talent", "hr", "people",
+    "team", "staff", "admin", "support", "info", "contact", "email",
+    "application", "position", "role", "job", "vacancy", "opportunity",
+    "update", "status", "notification", "alert", "digest", "newsletter",
+    "verify", "security", "code", "password", "login", "account",
+    "unknown", "company", "client", "employer", "organization", "firm",
+    "received", "confirmed", "submitted", "successful", "unsuccessful",
+    # ATS Platforms and Noise
+    "applytojob", "myworkday", "workday", "successfactors", "avature",
+    "icims", "jobvite", "smartrecruiters", "breezy", "ashby", "via",
+    "e", "fivesurveys", "growthassistant", "targetjobs", "getintoteaching",
+    "verify", "security", "code", "password", "login", "account",
+    "welcome", "confirm", "receipt", "order", "invoice", "payment",
+    "subscription", "newsletter", "digest", "update", "alert",
+    "notification", "support", "help", "contact", "info", "admin",
+    "noreply", "no-reply", "mailer", "service", "system", "auto"
+])
+
+# Generic email providers and platforms never used as the company name
+_IGNORED_DOMAINS = frozenset([
+    "gmail", "yahoo", "outlook", "hotmail", "mail", "no-reply", "noreply",
+    "workday", "greenhouse", "lever", "icims", "taleo", "ripplehire",
+    "smartrecruiters", "jobvite", "applytojob", "breezy", "ashby", "myworkday",
+    "via", "successfactors", "avature", "hire", "recruiting", "careers", "jobs",
+    "e", "fivesurveys", "growthassistant", "targetjobs", "getintoteaching",
+    "oscar-tech", "involved-solutions"
+])
+
+# Words that make an extracted role look like a real job title
+_JOB_WORDS_RE = re.compile(
+    r"engineer|developer|scientist|analyst|manager|intern|designer|architect|lead|senior|junior|graduate",
+    re.IGNORECASE
+)
+
+
+# Shared result for emails with neither company nor role (frozen, so safe to reuse)
+_JUNK_RESULT = ClassificationResult(
+    company="Unknown Company",
+    role="Unknown Position",
+    status="Applied",
+    confidence=0.0,
+    reasoning="Low confidence and missing metadata",
+    source="phrases"
+)
+
+
+def _domain_head(from_addr: str) -> str:
+    """First label of the sender's domain ("Foo <jobs@acme.com>" -> "acme"), or ""."""
+    at = from_addr.rfind("@")
+    if at == -1:
+        return ""
+    head, dot, _ = from_addr[at + 1:].partition(".")
+    return head if dot else ""
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _build_status_matcher(rules: dict[str, list[str]]):
+    """Split STATUS_RULES into an Aho-Corasick automaton of literal phrases
+    (value: (status, phrase)) and per-status compiled regexes for the rest.
+
+    Returns (None, None) if pyahocorasick is missing.
+    """
+    if ahocorasick is None:
+        return None, None
+    automaton = ahocorasick.Automaton()
+    regex_rules = {status: [] for status in rules}
+    for status in STATUS_ORDER:
+        for pattern in rules[status]:
+            group = _RULE_GROUP_RE.fullmatch(pattern)
+            alternatives = group.group(1).split("|") if group else []
+            if not alternatives or "(" in group.group(1):
+                regex_rules[status].append(re.compile(pattern))
+                continue
+            for alt in alternatives:
+                if _LITERAL_ALT_RE.fullmatch(alt):
+                    if alt not in automaton:
+                        automaton.add_word(alt, (status, alt))
+                else:
+                    regex_rules[status].append(re.compile(rf"\b(?:{alt})\b"))
+    automaton.make_automaton()
+    return automaton, regex_rules
+
+
+def _build_title_automaton(titles: list[str]):
+    """Aho-Corasick automaton over lowercase titles, valued (list_index, title); None without pyahocorasick."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for index, title in enumerate(titles):
+        if title not in automaton:
+            automaton.add_word(title, (index, title))
+    automaton.make_automaton()
+    return automaton
 
 
 class PhraseClassifier:
     """Keyword/phrase-based email classifier with priority logic."""
 
-    # Priority-based status rules (Regex patterns)
+    # Priority-based status rules (Regex patterns, compiled below; gaps are bounded
+    # with .{0,200} so a long body can't make them backtrack across the whole text)
     STATUS_RULES = {
         'Rejected': [
             r'\b(not selected|not moving forward|unfortunately|another candidate|not the right fit|wish you the best|will not be proceeding)\b',
-            r'\b(thank you for your interest.*but|we regret to inform|after careful consideration)\b',
+            r'\b(thank you for your interest.{0,200}but|we regret to inform|after careful consideration)\b',
             r'\b(position has been filled|decided not to proceed|unable to offer)\b'
         ],
         'Interview': [
             r'\b(interview|schedule a call|available times|calendar invite|zoom|google meet|teams meeting)\b',
-            r'\b(meet with|speak with|chat with).*?(interviewer|hiring manager|team)\b',
+            r'\b(meet with|speak with|chat with).{0,200}?(interviewer|hiring manager|team)\b',
             r'\b(phone screen|video call|on-site|onsite|final round)\b'
         ],
         'Assessment': [
@@ -29,6 +170,14 @@ class PhraseClassifier:
             r'\b(received your resume|application for the)\b'
         ]
     }
+    STATUS_AC, STATUS_REGEX_RULES = _build_status_matcher(STATUS_RULES)
+    STATUS_PATTERNS = {
+        status: re.compile("|".join(f"(?:{p})" for p in patterns))
+        for status, patterns in STATUS_RULES.items()
+    }
+
+    # Status phrases sit near the top of an email; the rest is signatures and quoted threads
+    MAX_SCAN_CHARS = 2000
 
     # Common job titles to look for
     JOB_TITLES = [
@@ -46,6 +195,7 @@ class PhraseClassifier:
         "mobile developer", "ios developer", "android developer",
         "intern", "graduate", "junior", "senior", "staff", "principal", "lead",
     ]
+    JOB_TITLES_AC = _build_title_automaton(JOB_TITLES)
 
     def classify(self, email: dict) -> ClassificationResult:
         """Classify email using priority phrase matching."""
@@ -54,8 +204,25 @@ class PhraseClassifier:
         snippet = email.get("snippet", "")
         from_addr = email.get("from", "")
         
-        # Combine for status matching (lowercase)
-        text = f"{subject} {snippet} {body}".lower()
+        # Extract company
+        company = self._extract_company(subject, body, from_addr)
+        
+        # Extract role
+        role = self._extract_role(subject, body)
+
+        # STRICTER LOGIC:
+        # If Company is "Unknown" AND Role is "Unknown", it's junk whatever the status,
+        # so skip status detection entirely
+        if not company and not role:
+            return _JUNK_RESULT
+
+        # Lowercased fields for status matching, scanned separately (GmailClient
+        # already stores subject_lower/body_lower, so usually nothing is re-lowered)
+        texts = (
+            email.get("subject_lower") or subject.lower(),
+            snippet.lower(),
+            (email.get("body_lower") or body[:self.MAX_SCAN_CHARS].lower())[:self.MAX_SCAN_CHARS],
+        )
 
         # Determine status using Priority Logic
         status = "Applied" # Default
@@ -65,58 +232,13 @@ class PhraseClassifier:
         # Check in order of priority: Rejected > Interview > Assessment > Applied
         # (Offer is implicitly Interview or separate, but for now we stick to these 4 statuses)
         
-        detected_status = None
-        matched_pattern = ""
-
-        # 1. Rejected
-        for pattern in self.STATUS_RULES['Rejected']:
-            if re.search(pattern, text):
-                detected_status = "Rejected"
-                matched_pattern = pattern
-                break
-        
-        # 2. Interview (if not rejected)
-        if not detected_status:
-           # Interview requires stronger signals or multiple signals
-           interview_signals = sum(1 for p in self.STATUS_RULES['Interview'] if re.search(p, text))
-           if interview_signals >= 1: # Relaxed slightly from 2 for better recall
-               detected_status = "Interview"
-               matched_pattern = "Interview patterns"
-        
-        # 3. Assessment
-        if not detected_status:
-            for pattern in self.STATUS_RULES['Assessment']:
-                if re.search(pattern, text):
-                    detected_status = "Assessment"
-                    matched_pattern = pattern
-                    break
-
-        # 4. Applied
-        if not detected_status:
-            for pattern in self.STATUS_RULES['Applied']:
-                if re.search(pattern, text):
-                    detected_status = "Applied"
-                    matched_pattern = pattern
-                    break
+        detected_status, matched_pattern = self._detect_status(texts)
 
         if detected_status:
             status = detected_status
             confidence = 0.8
             reasoning = f"Matched pattern for {status}"
 
-        # Extract company
-        company = self._extract_company(subject, body, from_addr)
-        
-        # Extract role
-        role = self._extract_role(subject, body)
-
-        # STRICTER LOGIC:
-        # If Company is "Unknown" AND Role is "Unknown", downgrade confidence
-        if not company and not role:
-            confidence = 0.0
-            reasoning = "Failed to extract Company or Role"
-            status = "Applied" # Reset to default if we can't identify what it is
-        
         # If we have a status match but no company/role, it might still be valid (e.g. "Status update"),
         # but if we have NO status match and NO company/role, it's definitely junk.
         if confidence < 0.6 and (not company or not role):
@@ -132,68 +254,66 @@ class PhraseClassifier:
             source="phrases"
         )
 
+    def classify_batch(self, emails: list[dict]) -> list[ClassificationResult]:
+        """Classify emails in order (the rules and automaton are shared class state)."""
+        classify = self.classify
+        return [classify(email) for email in emails]
+
+    def _detect_status(self, texts: tuple[str, ...]) -> tuple[Optional[str], str]:
+        """Return (status, matched phrase or pattern) by rule priority, or (None, "").
+
+        texts are lowercased fields; a rule matches if it matches any of them.
+        """
+        if self.STATUS_AC is not None:
+            # One automaton pass per field for the literal phrases, regexes only for the rest
+            literal_hits = {}
+            for text in texts:
+                for end, (status, phrase) in self.STATUS_AC.iter(text):
+                    start = end - len(phrase) + 1
+                    if (start == 0 or not _is_word_char(text[start - 1])) and \
+                            (end + 1 == len(text) or not _is_word_char(text[end + 1])):
+                        literal_hits.setdefault(status, phrase)
+            for status in STATUS_ORDER:
+                if status in literal_hits:
+                    return status, literal_hits[status]
+                for pattern in self.STATUS_REGEX_RULES[status]:
+                    if any(pattern.search(text) for text in texts):
+                        return status, pattern.pattern
+            return None, ""
+
+        # No automaton: one combined regex per status, checked in priority order
+        # (Interview needs only one signal, so any match counts)
+        for status in STATUS_ORDER:
+            pattern = self.STATUS_PATTERNS[status]
+            for text in texts:
+                match = pattern.search(text)
+                if match:
+                    return status, match.group()
+        return None, ""
+
     def _extract_company(self, subject: str, body: str, from_addr: str) -> str:
         """Extract company name from email."""
         # Common patterns for company names in body
-        patterns = [
-            r"(?:at|with|from|here at)\s+([A-Z][a-zA-Z0-9]+(?:\s+[A-Z][a-zA-Z0-9]+)?)",
-            r"([A-Z][a-zA-Z0-9]+(?:\s+[A-Z][a-zA-Z0-9]+)?)\s+(?:team|talent|careers|recruiting)",
-            r"interest in (?:the\s+)?(?:\w+\s+)?(?:position|role)?\s*(?:at|with)\s+([A-Z][a-zA-Z0-9]+)",
-        ]
-        
-        # Extensive blacklist of generic terms often mistaken for company names
-        blacklist = [
-            "the", "a", "an", "our", "your", "hey", "hi", "dear", "us", "me",
-            "hire", "hiring", "careers", "recruiting", "talent", "hr", "people",
-            "team", "staff", "admin", "support", "info", "contact", "email",
-            "application", "position", "role", "job", "vacancy", "opportunity",
-            "update", "status", "notification", "alert", "digest", "newsletter",
-            "verify", "security", "code", "password", "login", "account",
-            "unknown", "company", "client", "employer", "organization", "firm",
-            "received", "confirmed", "submitted", "successful", "unsuccessful",
-            # ATS Platforms and Noise
-            "applytojob", "myworkday", "workday", "successfactors", "avature",
-            "icims", "jobvite", "smartrecruiters", "breezy", "ashby", "via",
-            "e", "fivesurveys", "growthassistant", "targetjobs", "getintoteaching",
-            "verify", "security", "code", "password", "login", "account",
-            "welcome", "confirm", "receipt", "order", "invoice", "payment",
-            "subscription", "newsletter", "digest", "update", "alert",
-            "notification", "support", "help", "contact", "info", "admin",
-            "noreply", "no-reply", "mailer", "service", "system", "auto"
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, body)
+        for pattern in _COMPANY_PATTERNS:
+            match = pattern.search(body)
             if match:
                 company = match.group(1).strip()
-                if company.lower() not in blacklist:
+                if company.lower() not in _BLACKLIST:
                     return company
         
         # Fallback: Look for "Application to [Company]" in subject
-        subject_patterns = [
-            r"application\s+(?:to|for)\s+([A-Z][a-zA-Z0-9]+(?:\s+[A-Z][a-zA-Z0-9]+)?)",
-            r"your\s+(?:job\s+)?application\s+(?:at|with|to)\s+([A-Z][a-zA-Z0-9]+(?:\s+[A-Z][a-zA-Z0-9]+)?)",
-        ]
-        for pattern in subject_patterns:
-            match = re.search(pattern, subject, re.IGNORECASE)
+        for pattern in _SUBJECT_PATTERNS:
+            match = pattern.search(subject)
             if match:
                 company = match.group(1).strip()
-                if company.lower() not in blacklist:
+                if company.lower() not in _BLACKLIST:
                     return company
 
         # Try from email domain
-        match = re.search(r'@([^.]+)\.', from_addr)
-        if match:
-            domain = match.group(1)
-            # Filter out generic email providers and platforms
-            ignored = ["gmail", "yahoo", "outlook", "hotmail", "mail", "no-reply", "noreply", 
-                       "workday", "greenhouse", "lever", "icims", "taleo", "ripplehire",
-                       "smartrecruiters", "jobvite", "applytojob", "breezy", "ashby", "myworkday", 
-                       "via", "successfactors", "avature", "hire", "recruiting", "careers", "jobs",
-                       "e", "fivesurveys", "growthassistant", "targetjobs", "getintoteaching",
-                       "oscar-tech", "involved-solutions"]
-            if domain.lower() not in ignored:
-                return domain.title()
+        domain = _domain_head(from_addr)
+        # Filter out generic email providers and platforms
+        if domain and domain.lower() not in _IGNORED_DOMAINS:
+            return domain.title()
         
         return ""
 
@@ -202,30 +322,29 @@ class PhraseClassifier:
         content = f"{subject} {body}"
         
         # Look for "position of X" pattern first (most reliable)
-        position_patterns = [
-            r"position of\s+([A-Za-z\s\-\(\)]+?)(?:\s+at|\s+with|\.|,|\n)",
-            r"for the\s+([A-Za-z\s\-\(\)]+?)\s+(?:position|role)",
-            r"application for (?:the\s+)?([A-Za-z\s\-\(\)]+?)(?:\s+position|\s+role|\s+at|\.|,|\n)",
-            r"([A-Za-z\s\-]+(?:Engineer|Developer|Scientist|Analyst|Manager|Intern|Designer|Architect)[A-Za-z\s\-\(\)]*)",
-        ]
-        
-        for pattern in position_patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
+        for pattern in _ROLE_PATTERNS:
+            match = pattern.search(content)
             if match:
                 role = match.group(1).strip()
-                role = re.sub(r'\s+', ' ', role)
+                role = _WHITESPACE_RE.sub(' ', role)
                 if 5 < len(role) < 80:
                     # Only use if it contains a job-related word
-                    role_lower = role.lower()
-                    job_words = ["engineer", "developer", "scientist", "analyst", "manager", 
-                                "intern", "designer", "architect", "lead", "senior", "junior", "graduate"]
-                    if any(word in role_lower for word in job_words):
+                    if _JOB_WORDS_RE.search(role):
                         return role.title() if role.islower() else role
-        
-        # Fallback: look for known job titles
+
+        # Then the title-cased words around a job keyword (bounded scan, unlike
+        # a catch-all regex that backtracks badly on long unpunctuated bodies)
+        role = role_around_keyword(content)
+        if role:
+            return role
+
+        # Fallback: look for known job titles (earliest in JOB_TITLES wins)
         content_lower = content.lower()
+        if self.JOB_TITLES_AC is not None:
+            hit = min((value for _, value in self.JOB_TITLES_AC.iter(content_lower)), default=None)
+            return hit[1].title() if hit else ""
         for title in self.JOB_TITLES:
-            if title.lower() in content_lower:
+            if title in content_lower:
                 return title.title()
         
         return ""
@@ -1,15 +1,11 @@
 """Google Sheets client for tracking job applications."""
 
 import json
-from datetime import datetime
+import time
+from datetime import date, datetime
 from pathlib import Path
 from typing import Optional
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-
 from .config import (
     ALL_SCOPES,
     TOKEN_PATH,
@@ -32,6 +28,55 @@ STATUS_COLORS = {
 }
 
 
+# Seconds a fetched copy of the Applications tab is reused (any write drops it sooner)
+APPS_CACHE_TTL = 60
+
+# Row fields in sheet column order (matches SHEET_HEADERS)
+APPLICATION_FIELDS = [
+    "company",
+    "role",
+    "status",
+    "applied_date",
+    "last_updated",
+    "email_subject",
+    "detection_reason",
+    "action_link",
+]
+_HEADER_COUNT = len(SHEET_HEADERS)
+
+
+def index_applications(applications: list[dict]) -> dict[str, list[tuple[int, dict]]]:
+    """Group (row_index, app) pairs by lowercased company, in sheet order."""
+    index = {}
+    for i, app in enumerate(applications):
+        index.setdefault(app["company"].lower(), []).append((i + 2, app))
+    return index
+
+
+def match_role(company_rows, role: str) -> Optional[tuple[int, dict]]:
+    """First (row_index, app) among one company's rows that matches role."""
+    role_lower = role.lower()
+    for row_index, app in company_rows:
+        # If either role is unknown, treat as same application
+        if role_lower == "unknown position":
+            return (row_index, app)
+        app_role = app["role"].lower()
+        if app_role == role_lower or app_role == "unknown position":
+            return (row_index, app)
+    return None
+
+
+def format_applied_date(applied_date: datetime) -> str:
+    """Format an email date for the Applied Date column.
+
+    The date is taken as written, so aware datetimes keep their own calendar
+    day. Anything that isn't a date falls back to today.
+    """
+    if not isinstance(applied_date, date):
+        applied_date = datetime.now()
+    return applied_date.strftime("%Y-%m-%d")
+
+
 class SheetsClient:
     """Client for interacting with Google Sheets API."""
 
@@ -40,6 +85,9 @@ class SheetsClient:
         self.creds = None
         self.spreadsheet_id = self._load_spreadsheet_id()
         self.sheet_id = 0  # Default sheet ID for "Applications" tab
+        self._apps_cache = None  # Last get_all_applications() result
+        self._apps_cache_expires = 0.0
+        self._company_index = {}  # index_applications(self._apps_cache)
         self._authenticate()
         self._ensure_spreadsheet()
 
@@ -69,6 +117,12 @@ class SheetsClient:
 
     def _authenticate(self):
         """Authenticate with Google Sheets API using OAuth2."""
+        # Google client libraries are slow to import; load them only when connecting
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         if TOKEN_PATH.exists():
             self.creds = Credentials.from_authorized_user_file(str(TOKEN_PATH), ALL_SCOPES)
 
@@ -263,12 +317,12 @@ class SheetsClient:
 
     def apply_row_color(self, row_index: int, status: str):
         """Apply color to a specific row based on status."""
-        if status not in STATUS_COLORS:
-            return
-            
-        color = STATUS_COLORS[status]
-        try:
-            request = {
+        self.apply_row_colors([(row_index, status)])
+
+    def apply_row_colors(self, changes: list[tuple[int, str]]):
+        """Apply status colors to several rows in a single batchUpdate."""
+        requests = [
+            {
                 "repeatCell": {
                     "range": {
                         "sheetId": self.sheet_id,
@@ -279,21 +333,40 @@ class SheetsClient:
                     },
                     "cell": {
                         "userEnteredFormat": {
-                            "backgroundColor": color
+                            "backgroundColor": STATUS_COLORS[status]
                         }
                     },
                     "fields": "userEnteredFormat.backgroundColor"
                 }
             }
+            for row_index, status in changes
+            if status in STATUS_COLORS
+        ]
+        if not requests:
+            return
+
+        try:
             self.service.spreadsheets().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
-                body={"requests": [request]}
+                body={"requests": requests}
             ).execute()
         except Exception as e:
             print(f"Warning: Could not apply color: {e}")
 
+    def invalidate_applications_cache(self):
+        """Forget the cached rows so the next read goes to the sheet."""
+        self._apps_cache = None
+
     def get_all_applications(self) -> list[dict]:
-        """Get all existing applications from the sheet."""
+        """Get all existing applications from the sheet.
+
+        Results are cached for APPS_CACHE_TTL seconds and dropped on every
+        write through this client, so repeated lookups in one run share a
+        single read.
+        """
+        if self._apps_cache is not None and time.monotonic() < self._apps_cache_expires:
+            return self._apps_cache
+
         try:
             result = self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
@@ -303,46 +376,36 @@ class SheetsClient:
 
             applications = []
             for row in values:
-                while len(row) < len(SHEET_HEADERS):
-                    row.append("")
-                applications.append({
-                    "company": row[0],
-                    "role": row[1],
-                    "status": row[2],
-                    "applied_date": row[3],
-                    "last_updated": row[4],
-                    "email_subject": row[5],
-                    "detection_reason": row[6] if len(row) > 6 else "",
-                    "action_link": row[7] if len(row) > 7 else "",
-                })
-
+                # The API drops trailing empty cells; pad in one step
+                missing = _HEADER_COUNT - len(row)
+                if missing > 0:
+                    row += [""] * missing
+                applications.append(dict(zip(APPLICATION_FIELDS, row)))
+
+            self._apps_cache = applications
+            self._company_index = index_applications(applications)
+            self._apps_cache_expires = time.monotonic() + APPS_CACHE_TTL
             return applications
         except Exception as e:
             print(f"Error getting applications: {e}")
             return []
 
     def find_application(self, company: str, role: str):
-        applications = self.get_all_applications()
-
-        for i, app in enumerate(applications):
-            if app["company"].lower() == company.lower():
-                # If either role is unknown, treat as same application
-                if (
-                    app["role"].lower() == role.lower() or
-                    app["role"].lower() == "unknown position" or
-                    role.lower() == "unknown position"
-                ):
-                    return (i + 2, app)
-        return None
+        """Find an existing application by company and role."""
+        return match_role(self._company_rows(company), role)
 
     
     def find_application_by_company(self, company: str) -> Optional[tuple[int, dict]]:
         """Find an existing application by company name only."""
+        return next(iter(self._company_rows(company)), None)
+
+    def _company_rows(self, company: str):
+        """(row_index, app) pairs for a company, from the cached index when possible."""
         applications = self.get_all_applications()
-        for i, app in enumerate(applications):
-            if app["company"].lower() == company.lower():
-                return (i + 2, app)
-        return None
+        if applications is self._apps_cache:
+            return self._company_index.get(company.lower(), ())
+        # Read failed (empty list, not cached): nothing to match against
+        return ()
 
     def add_application(
         self,
@@ -358,14 +421,7 @@ class SheetsClient:
 
         """Add a new application or update existing one."""
         now = datetime.now().strftime("%Y-%m-%d %H:%M")
-        
-        try:
-            if hasattr(applied_date, 'tzinfo') and applied_date.tzinfo is not None:
-                applied_str = applied_date.replace(tzinfo=None).strftime("%Y-%m-%d")
-            else:
-                applied_str = applied_date.strftime("%Y-%m-%d")
-        except Exception:
-            applied_str = datetime.now().strftime("%Y-%m-%d")
+        applied_str = format_applied_date(applied_date)
 
         existing = self.find_application(company, role)
 
@@ -386,21 +442,22 @@ class SheetsClient:
             
             # Use update instead of append
             # Fixed range to A:H (8 columns) to match data length
+            row_data = self.add_row_data(next_row, {
+                "company": company,
+                "role": role,
+                "status": status,
+                "applied_date": applied_str,
+                "last_updated": now,
+                "email_subject": email_subject,
+                "detection_reason": detection_reason,
+                "action_link": action_link,
+            })
+            self.invalidate_applications_cache()
             self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
-                range=f"Applications!A{next_row}:H{next_row}",
+                range=row_data["range"],
                 valueInputOption="RAW",
-                body={"values": [[
-                    company,
-                    role,
-                    status,
-                    applied_str,
-                    now,
-                    email_subject,
-                    detection_reason,
-                    action_link
-                ]]}
-
+                body={"values": row_data["values"]}
             ).execute()
             
             # Apply conditional formatting color manually for the new row
@@ -426,32 +483,10 @@ class SheetsClient:
     ) -> tuple[bool, str]:
         """Update an existing application row."""
         try:
-            # Use batchUpdate to avoid overwriting Applied Date (Col D) and Reason (Col G)
-            data = [
-                # Status (Col C)
-                {
-                    "range": f"Applications!C{row_index}",
-                    "values": [[status]]
-                },
-                # Last Updated, Email Subject (Cols E, F)
-                {
-                    "range": f"Applications!E{row_index}:F{row_index}",
-                    "values": [[last_updated, email_subject]]
-                },
-                # Action Link (Col H)
-                {
-                    "range": f"Applications!H{row_index}",
-                    "values": [[action_link]]
-                }
-            ]
-            
-            # If company/role provided, update A:B
-            if company and role:
-                data.append({
-                    "range": f"Applications!A{row_index}:B{row_index}",
-                    "values": [[company, role]]
-                })
-
+            data = self.update_row_data(
+                row_index, status, last_updated, email_subject, company, role, action_link
+            )
+            self.invalidate_applications_cache()
             self.service.spreadsheets().values().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
                 body={
@@ -470,8 +505,86 @@ class SheetsClient:
             return False, msg
 
 
+    def add_row_data(self, row_index: int, app: dict) -> dict:
+        """Build the values.batchUpdate entry that writes a full application row."""
+        return {
+            "range": f"Applications!A{row_index}:H{row_index}",
+            "values": [[app.get(field, "") for field in APPLICATION_FIELDS]]
+        }
+
+    def update_row_data(
+        self,
+        row_index: int,
+        status: str,
+        last_updated: str,
+        email_subject: str = "",
+        company: str = None,
+        role: str = None,
+        action_link: str = ""
+    ) -> list[dict]:
+        """Build the values.batchUpdate entries for updating an existing row."""
+        # Separate ranges avoid overwriting Applied Date (Col D) and Reason (Col G)
+        data = [
+            # Status (Col C)
+            {
+                "range": f"Applications!C{row_index}",
+                "values": [[status]]
+            },
+            # Last Updated, Email Subject (Cols E, F)
+            {
+                "range": f"Applications!E{row_index}:F{row_index}",
+                "values": [[last_updated, email_subject]]
+            },
+            # Action Link (Col H)
+            {
+                "range": f"Applications!H{row_index}",
+                "values": [[action_link]]
+            }
+        ]
+        
+        # If company/role provided, update A:B (or just the one that was given)
+        if company and role:
+            data.append({
+                "range": f"Applications!A{row_index}:B{row_index}",
+                "values": [[company, role]]
+            })
+        elif company:
+            data.append({
+                "range": f"Applications!A{row_index}",
+                "values": [[company]]
+            })
+        elif role:
+            data.append({
+                "range": f"Applications!B{row_index}",
+                "values": [[role]]
+            })
+        return data
+
+    def batch_write(self, data: list[dict], row_colors: dict[int, str]) -> tuple[bool, str]:
+        """Write buffered row changes in one values.batchUpdate, then recolor rows."""
+        if not data:
+            return True, "Nothing to write"
+
+        self.invalidate_applications_cache()
+        try:
+            self.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={
+                    "valueInputOption": "RAW",
+                    "data": data
+                }
+            ).execute()
+        except Exception as e:
+            msg = f"Error writing to sheet: {str(e)}"
+            print(msg)
+            return False, msg
+
+        self.apply_row_colors(list(row_colors.items()))
+        return True, f"Wrote {len(row_colors)} rows"
+
     def clear_sheet(self) -> bool:
         """Clear all application data from the sheet (keeps headers)."""
+        self.invalidate_applications_cache()
         try:
             self.service.spreadsheets().values().clear(
                 spreadsheetId=self.spreadsheet_id,
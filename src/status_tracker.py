@@ -1,27 +1,78 @@
 """Status tracker for managing application progression."""
 
+from collections import Counter
 from datetime import datetime
+from itertools import product
 from typing import Optional
 
-from .sheets_client import SheetsClient
+from .sheets_client import SheetsClient, format_applied_date, index_applications, match_role
 from .ai_classifier import ClassificationResult
 
 
+def _parse_last_updated(value: str) -> Optional[datetime]:
+    """Parse a "YYYY-MM-DD HH:MM" Last Updated cell (None if unreadable).
+
+    The format is fixed (we write it), so slicing beats strptime's format parsing.
+    """
+    if not value or len(value) < 16:
+        return None  # Blank or date-only cells are common; skip the exception path
+    try:
+        return datetime(
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16])
+        )
+    except ValueError:
+        return None
+
+
+def _is_unknown(value: str) -> bool:
+    """Whether a company/role is empty or a classifier placeholder ("Unknown ...")."""
+    return not value or value[:7].lower() == "unknown"
+
+
+def _format_now() -> str:
+    """Current local time in the Last Updated format ("%Y-%m-%d %H:%M")."""
+    now = datetime.now()
+    return f"{now.year:04d}-{now.month:02d}-{now.day:02d} {now.hour:02d}:{now.minute:02d}"
+
+
+# Status priority for comparison (higher = more advanced)
+_STATUS_PRIORITY = {
+    "Applied": 1,
+    "Assessment": 2,
+    "Interview": 3,
+    "Offer": 4,     # Highest positive status
+    "Rejected": 0,  # Rejected is final but lower priority for updates (handled specially)
+}
+
+# (current, new) -> whether new should replace current, precomputed from _STATUS_PRIORITY
+_UPDATE_TABLE = {
+    (current, new): new_priority >= current_priority
+    for (current, current_priority), (new, new_priority)
+    in product(_STATUS_PRIORITY.items(), repeat=2)
+}
+
+
 class StatusTracker:
     """Tracks application status progression based on latest email."""
 
-    # Status priority for comparison (higher = more advanced)
-    STATUS_PRIORITY = {
-        "Applied": 1,
-        "Assessment": 2,
-        "Interview": 3,
-        "Offer": 4,     # Highest positive status
-        "Rejected": 0,  # Rejected is final but lower priority for updates (handled specially)
-    }
+    __slots__ = (
+        "sheets", "_batch_now", "_staged_apps", "_staged_index",
+        "_pending_adds", "_pending_updates", "_pending_colors",
+    )
+
+    STATUS_PRIORITY = _STATUS_PRIORITY
 
     def __init__(self, sheets_client: SheetsClient):
         self.sheets = sheets_client
-        self._cache = {}  # Cache of known applications
+
+        # Write buffer used by stage()/flush()
+        self._batch_now = None  # Last Updated stamp shared by everything in the batch
+        self._staged_apps = None  # Sheet rows as of the first stage(), plus staged changes
+        self._staged_index = {}  # company.lower() -> [(row_index, app)] over _staged_apps
+        self._pending_adds = {}  # row_index -> staged app, written in full on flush
+        self._pending_updates = {}  # range -> values.batchUpdate entry (last write wins)
+        self._pending_colors = {}  # row_index -> status
 
     def process_classification(
         self,
@@ -43,59 +94,118 @@ class StatusTracker:
         Returns:
             (success, reason)
         """
+        updated, reason = self.stage(
+            result, email_date, email_subject, detection_reason, force_update
+        )
+        written, write_reason = self.flush()
+        if updated and not written:
+            return False, write_reason
+        return updated, reason
+
+    def stage(
+        self,
+        result: ClassificationResult,
+        email_date: datetime,
+        email_subject: str,
+        detection_reason: str = "",
+        force_update: bool = False
+    ) -> tuple[bool, str]:
+        """
+        Like process_classification, but buffer the sheet write until flush().
+
+        Staged changes are visible to later stage() calls, so several emails
+        about the same application resolve against each other.
+        """
+        if self._staged_apps is None:
+            # Copy: staged changes must not leak into SheetsClient's cached rows
+            self._staged_apps = [dict(app) for app in self.sheets.get_all_applications()]
+            self._staged_index = index_applications(self._staged_apps)
+            self._batch_now = _format_now()
 
         company = result.company
         role = result.role
         status = result.status
         action_link = result.action_link or ""
 
+        # Last Updated timestamps are naive, so compare against a naive email date
+        email_date_naive = email_date.replace(tzinfo=None) if email_date.tzinfo else email_date
+
         # Check if this is a new application or update
-        existing = self.sheets.find_application(company, role)
+        existing = match_role(self._staged_index.get(company.lower(), ()), role)
 
         if existing:
             row_index, app = existing
             return self._handle_update(
-                row_index, app, status, email_date, email_subject, company, role, action_link, force_update
+                row_index, app, status, email_date_naive, email_subject, company, role, action_link, force_update
             )
-        else:
-            # New application
-            added, reason = self.sheets.add_application(
-                company=company,
-                role=role,
-                status=status,
-                applied_date=email_date,
-                email_subject=email_subject,
-                detection_reason=detection_reason,
-                action_link=action_link
-            )
-            if added:
-                return True, "Created new application"
-            return False, f"Failed to create application: {reason}"
-
-
 
-        # If this email is older, skip
-        if email_date_naive < existing_date:
-            return False
-
-        # Determine if we should update Company/Role
-        # If existing is generic/unknown and new is specific, update it
-        update_meta = False
-        new_company = None
-        new_role = None
-        
-        ex_company = existing_app.get("company", "Unknown")
-        ex_role = existing_app.get("role", "Unknown")
-        
-        # Heuristic: If existing starts with "Unknown" or is very short, and new is better
-        if "unknown" in ex_company.lower() and "unknown" not in email_subject.lower(): # Name comes from result, not subject
-             # actually we don't have new company passed to this method!
-             # We need to change signature of _handle_update
-             pass
-
-        # ... Wait, I can't access new company/role here without changing signature.
-        # Let's fix signature first.
-        pass
+        # New application
+        row_index = len(self._staged_apps) + 2
+        app = {
+            "company": company,
+            "role": role,
+            "status": status,
+            "applied_date": format_applied_date(email_date),
+            "last_updated": self._batch_now,
+            "email_subject": email_subject,
+            "detection_reason": detection_reason,
+            "action_link": action_link,
+        }
+        self._staged_apps.append(app)
+        self._staged_index.setdefault(company.lower(), []).append((row_index, app))
+        self._pending_adds[row_index] = app
+        self._pending_colors[row_index] = status
+        return True, "Created new application"
+
+    def flush(self) -> tuple[bool, str]:
+        """Write all staged changes to the sheet in one batch."""
+        # Repeated changes to a row have coalesced, so each range is written once
+        data = [
+            self.sheets.add_row_data(row_index, app)
+            for row_index, app in self._pending_adds.items()
+        ]
+        data.extend(self._pending_updates.values())
+        colors = self._pending_colors
+
+        self._batch_now = None
+        self._staged_apps = None
+        self._staged_index = {}
+        self._pending_adds = {}
+        self._pending_updates = {}
+        self._pending_colors = {}
+        return self.sheets.batch_write(data, colors)
+
+    def _stage_update(
+        self,
+        row_index: int,
+        app: dict,
+        status: str,
+        last_updated: str,
+        email_subject: str,
+        company: str = None,
+        role: str = None,
+        action_link: str = ""
+    ):
+        """Buffer an update to an existing row and reflect it in the staged rows."""
+        if row_index not in self._pending_adds:
+            # Rows added in this batch are written from the staged app on flush
+            for entry in self.sheets.update_row_data(
+                row_index, status, last_updated, email_subject, company, role, action_link
+            ):
+                self._pending_updates[entry["range"]] = entry
+        self._pending_colors[row_index] = status
+
+        app.update(
+            status=status,
+            last_updated=last_updated,
+            email_subject=email_subject,
+            action_link=action_link,
+        )
+        # Rows are matched on company, so this never moves the row in _staged_index
+        if company:
+            app["company"] = company
+        if role:
+            app["role"] = role
         
     def _handle_update(
         self,
@@ -104,81 +214,81 @@ class StatusTracker:
         new_status: str,
         email_date: datetime,
         email_subject: str,
-
-        new_company: str = None, 
+        new_company: str = None,
         new_role: str = None,
         action_link: str = "",
         force_update: bool = False
     ) -> tuple[bool, str]:
-
-
         """Handle updating an existing application."""
         existing_status = existing_app.get("status", "")
+
+        # Offer is the top status: below-Offer news can only matter via a link or better metadata
+        if (
+            existing_status == "Offer"
+            and new_status not in ("Offer", "Rejected")
+            and not action_link
+            and not _is_unknown(existing_app.get("company", ""))
+            and not _is_unknown(existing_app.get("role", ""))
+        ):
+            return False, "Already at Offer"
+
         last_updated_str = existing_app.get("last_updated", "")
 
         # Parse existing date
-        try:
-            existing_date = datetime.strptime(last_updated_str, "%Y-%m-%d %H:%M")
-        except Exception:
-            existing_date = datetime.min
-
-        # Normalize email_date to naive datetime for comparison
-        try:
-            if hasattr(email_date, 'tzinfo') and email_date.tzinfo is not None:
-                email_date_naive = email_date.replace(tzinfo=None)
-            else:
-                email_date_naive = email_date
-        except Exception:
-            email_date_naive = datetime.now()
-
-        # If this email is older, skip (unless forced)
-        if not force_update and email_date_naive < existing_date:
+        existing_date = _parse_last_updated(last_updated_str)
+
+        # If this email is older, skip (unless forced); email_date is already naive.
+        # A row without a readable Last Updated never blocks an update.
+        if existing_date is not None and not force_update and email_date < existing_date:
             return False, f"Email older than last update ({existing_date})"
 
+        now_str = self._batch_now or _format_now()
 
         # Check if we should refine Company/Role
         updated_company = None
         updated_role = None
         
-        if new_company and "unknown" in existing_app.get("company", "").lower() and "unknown" not in new_company.lower():
+        if not _is_unknown(new_company) and _is_unknown(existing_app.get("company", "")):
             updated_company = new_company
-            
-        if new_role and "unknown" in existing_app.get("role", "").lower() and "unknown" not in new_role.lower():
+
+        if not _is_unknown(new_role) and _is_unknown(existing_app.get("role", "")):
             updated_role = new_role
 
 
         # If email is newer, update based on status
         # Rejected and Offer statuses always takes precedence
         if new_status == "Rejected":
-            success = self.sheets.update_application(
-                row_index=row_index,
+            self._stage_update(
+                row_index,
+                existing_app,
                 status="Rejected",
-                last_updated=datetime.now().strftime("%Y-%m-%d %H:%M"),
-
+                last_updated=now_str,
                 email_subject=email_subject,
                 company=updated_company,
                 role=updated_role,
                 action_link=action_link
             )
-            return success, "Marked as Rejected"
+            return True, "Marked as Rejected"
 
 
 
         # Otherwise, only upgrade status
-        if self._should_update_status(existing_status, new_status, action_link) or updated_company or updated_role:
-             # Even if status matches, if we have better metadata, update!
-            target_status = new_status if self._should_update_status(existing_status, new_status, action_link) else existing_status
-            
-            success = self.sheets.update_application(
-                row_index=row_index,
+        should_upgrade = self._should_update_status(existing_status, new_status, action_link)
+        if should_upgrade or updated_company or updated_role:
+            # Even if status matches, if we have better metadata, update!
+            target_status = new_status if should_upgrade else existing_status
+
+            self._stage_update(
+                row_index,
+                existing_app,
                 status=target_status,
-                last_updated=datetime.now().strftime("%Y-%m-%d %H:%M"),
+                last_updated=now_str,
                 email_subject=email_subject,
                 company=updated_company,
                 role=updated_role,
                 action_link=action_link
             )
-            return success, f"Updated status to {target_status}"
+            return True, f"Updated status to {target_status}"
 
 
 
@@ -188,37 +298,27 @@ class StatusTracker:
 
     def _should_update_status(self, current: str, new: str, action_link: str = "") -> bool:
         """Determine if we should update from current to new status."""
-        current_priority = self.STATUS_PRIORITY.get(current, 0)
-        new_priority = self.STATUS_PRIORITY.get(new, 0)
-
-        # Always update if new is higher priority
-        # Also update if current is Rejected but new is Interview/Offer (re-engagement/mistake correction)
-        # Note: Rejected is 0, so any status > 0 updates it IF the email is newer (handled in _handle_update logic check above? No, wait)
-        
-        # logic in _handle_update: if new_status == "Rejected" OR should_update_status...
-        # Here we just compare priorities.
         if action_link:
-             return True # If there's a link, we want to update it
-        
-        return new_priority >= current_priority
+            return True  # If there's a link, we want to update it
+
+        # Update if new is at least as advanced; Rejected is 0, so anything re-opens it
+        decision = _UPDATE_TABLE.get((current, new))
+        if decision is None:
+            # Status outside _STATUS_PRIORITY (e.g. a hand-edited cell) counts as 0
+            decision = _STATUS_PRIORITY.get(new, 0) >= _STATUS_PRIORITY.get(current, 0)
+        return decision
 
 
     def get_statistics(self) -> dict:
         """Get application statistics."""
         applications = self.sheets.get_all_applications()
+        counts = Counter(app.get("status", "Applied") for app in applications)
 
-        stats = {
+        return {
             "total": len(applications),
-            "Applied": 0,
-            "Assessment": 0,
-            "Interview": 0,
-            "Offer": 0,
-            "Rejected": 0,
+            "Applied": counts["Applied"],
+            "Assessment": counts["Assessment"],
+            "Interview": counts["Interview"],
+            "Offer": counts["Offer"],
+            "Rejected": counts["Rejected"],
         }
-
-        for app in applications:
-            status = app.get("status", "Applied")
-            if status in stats:
-                stats[status] += 1
-
-        return stats